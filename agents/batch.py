@@ -0,0 +1,167 @@
+"""
+Gemini Batch Mode runner for non-interactive (CI) analysis.
+
+Instead of driving the agent pipeline file by file, every file is parsed and
+analyzed locally with the same tools the agents use, then submitted as one
+inline Gemini batch job: one request per file containing the fused analyzer
+prompt plus the tool output. Batch jobs cost ~50% of real-time calls and are
+not subject to per-minute rate limits, at the price of minutes of latency.
+"""
+
+import asyncio
+
+from google import genai
+from google.genai import types
+
+from agents import format_report
+from parser_bridge import AstContext, store_ast
+from parser_cache import code_hash, parse_react_code_cached
+from tools import (
+    inspect_component, analyze_render_triggers, analyze_hook_dependencies,
+    analyze_state_relationships, analyze_jsx_expressions
+)
+from utils import dumps_json
+
+BATCH_MODEL = "gemini-2.5-flash"
+POLL_INTERVAL_SECONDS = 30
+
+_TERMINAL_STATES = {
+    types.JobState.JOB_STATE_SUCCEEDED,
+    types.JobState.JOB_STATE_FAILED,
+    types.JobState.JOB_STATE_CANCELLED,
+    types.JobState.JOB_STATE_EXPIRED,
+}
+
+BATCH_INSTRUCTION = """
+You are a React Performance Analysis expert.
+You receive a React file together with the output of AST analysis tools
+(render triggers, hook dependencies, state relationships, JSX expressions)
+for every component in it.
+
+Validate every finding before reporting it:
+- Inline functions/objects only matter if the child is memoized (React.memo)
+- Missing useCallback isn't an issue if the callback isn't passed to memoized children
+- Severity: critical (broken memoization, stale closures), high (unstable hook deps),
+  medium (unnecessary re-renders), low (minor optimizations)
+
+Filter aggressively. Developers hate false positives.
+
+Respond with ONLY this JSON:
+
+{"issues": [{"file": "file.tsx", "line": 42, "component": "Name", "severity": "critical|high|medium|low", "confidence": "high|medium|low", "title": "Brief title", "problem": "Description", "suggestion": "How to fix"}], "summary": {"total_issues": N, "components_analyzed": ["Name"]}}
+
+If no issues: {"issues": [], "summary": {"total_issues": 0}}
+"""
+
+
+def collect_tool_output(code: str, filename: str) -> dict:
+    """
+    Parse a file and run every analysis tool on each of its components.
+
+    Args:
+        code: React/TypeScript source code
+        filename: Filename for context
+
+    Returns:
+        Parse errors plus per-component analysis results
+    """
+    result = parse_react_code_cached(code, filename)
+    ctx = AstContext()
+    ctx.set_data(result, filename, source_hash=code_hash(code))
+    ast_id = store_ast(ctx)
+
+    components = {}
+    for name in ctx.get_all_component_names():
+        components[name] = {
+            "details": inspect_component(ast_id, name, filename),
+            "render_triggers": analyze_render_triggers(ast_id, name, filename),
+            "hook_dependencies": analyze_hook_dependencies(ast_id, name, None, filename),
+            "state_relationships": analyze_state_relationships(ast_id, name, filename),
+            "jsx_expressions": analyze_jsx_expressions(ast_id, name, filename),
+        }
+
+    return {"errors": result.errors, "components": components}
+
+
+def build_request(code: str, filename: str) -> dict:
+    """Build one inline batch request (fused prompt + tool output) for a file."""
+    tool_output = collect_tool_output(code, filename)
+    prompt = f"""
+File: {filename}
+
+```tsx
+{code}
+```
+
+## Tool output
+
+```json
+{dumps_json(tool_output)}
+```
+"""
+    return {
+        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+        "config": {
+            "system_instruction": BATCH_INSTRUCTION,
+            "response_mime_type": "application/json",
+        },
+    }
+
+
+async def run_batch_analysis(files: dict[str, str], output_format: str = "markdown") -> dict:
+    """
+    Analyze several files with one Gemini inline batch job.
+
+    Args:
+        files: Mapping of filename -> source code
+        output_format: Output format (markdown, json, github)
+
+    Returns:
+        Dictionary mapping filenames to their formatted reports (an error
+        dict for files whose batch response is missing or failed)
+    """
+    filenames = list(files)
+    # Parsing and the local tool runs are independent per file
+    requests = await asyncio.gather(
+        *(asyncio.to_thread(build_request, files[f], f) for f in filenames)
+    )
+
+    client = genai.Client()
+    job = await client.aio.batches.create(
+        model=BATCH_MODEL,
+        src=requests,
+        config={"display_name": "react-perf-guardian"},
+    )
+    print(f"📦 Submitted batch job {job.name} with {len(requests)} file(s)")
+
+    while job.state not in _TERMINAL_STATES:
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        job = await client.aio.batches.get(name=job.name)
+        print(f"   ⏳ Batch job state: {job.state.name}")
+
+    if job.state != types.JobState.JOB_STATE_SUCCEEDED:
+        error = job.error.message if job.error else job.state.name
+        raise RuntimeError(f"Batch job {job.name} did not succeed: {error}")
+
+    responses = list(job.dest.inlined_responses or []) if job.dest else []
+    if len(responses) != len(filenames):
+        print(f"⚠️  Batch job {job.name} returned {len(responses)} response(s) "
+              f"for {len(filenames)} file(s)")
+
+    # Responses come back in request order; a missing or failed one gets the
+    # same error dict analyze_multiple_files stores for a file that raised,
+    # never an empty (clean-looking) report
+    results = {}
+    for index, filename in enumerate(filenames):
+        inlined = responses[index] if index < len(responses) else None
+        if inlined is None:
+            results[filename] = {"error": "No response in batch job output", "error_type": "BatchError"}
+        elif inlined.error or not inlined.response:
+            error = inlined.error.message if inlined.error and inlined.error.message else "Empty response"
+            results[filename] = {"error": f"Batch request failed: {error}", "error_type": "BatchError"}
+        else:
+            results[filename] = format_report(inlined.response.text, output_format)
+
+    analyzed = sum(1 for result in results.values() if not isinstance(result, dict))
+    print(f"✅ Batch job finished: {analyzed}/{len(filenames)} file(s) analyzed")
+    return results
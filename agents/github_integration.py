@@ -5,13 +5,28 @@ Fetches changed files from a PR and posts review comments.
 """
 
 import os
+import sys
 import json
 import asyncio
 import re
+import random
+import time
+import traceback
+import logging
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 from dotenv import load_dotenv
 import subprocess
+import atexit
+import threading
+from collections import Counter
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+from memory import summarize_cross_file_patterns
+from schemas import INVALID_REPORT_STATUS
+from utils import dumps_json, loads_json, install_fast_event_loop
 
 # Load .env file if it exists (silently ignore if not)
 try:
@@ -19,6 +34,159 @@ try:
 except:
     pass
 
+logger = logging.getLogger("react_perf_guardian.github")
+
+# Files fetched/analyzed at once per PR (bounds GitHub and Gemini rate usage)
+MAX_CONCURRENT_FILES = 8
+
+# main.analyze_code, imported on first use: importing main sets up the
+# session database and agents, which plain GitHub helpers don't need
+_analyze_code = None
+
+
+def _get_analyze_code():
+    """Return main.analyze_code, importing main only once."""
+    global _analyze_code
+    if _analyze_code is None:
+        from main import analyze_code
+        _analyze_code = analyze_code
+    return _analyze_code
+
+
+# Compiled once: used for every PR URL and every analyzed file
+_PR_URL_RE = re.compile(r'(?:https?://)?(?:www\.)?github\.com/([^/]+)/([^/]+)/pull/(\d+)')
+_FENCE_RE = re.compile(r'```(?:json)?\s*(\{[\s\S]*?\})\s*```')
+_JSON_OBJ_RE = re.compile(r'\{[\s\S]*"issues"[\s\S]*\}')
+
+# Changed files worth analyzing
+_REACT_EXTENSIONS = ('.tsx', '.ts', '.jsx', '.js')
+_VALID_STATUSES = frozenset({'added', 'modified'})
+
+# Lowercase phrases that mark an agent reply as an error message
+_ERROR_INDICATORS = ("i'm sorry", "error", "failed", "cannot parse", "unable to")
+
+# Review summary bodies, keyed by the review outcome; filled with str.format
+_REVIEW_TEMPLATES = {
+    "critical": """
+## 🚨 React Performance Review
+
+**Critical issues found: {critical_count}**
+
+This PR has {critical_count} critical performance issue(s) that should be addressed.
+
+**Summary:**
+- 🚨 Critical: {critical_count}
+- ⚠️ High: {high_count}
+- 💡 Total issues: {total_count}
+
+Please review the inline comments for details.
+{memory_section}
+""",
+    "high": """
+## ⚠️ React Performance Review
+
+**High-priority issues found: {high_count}**
+
+**Summary:**
+- ⚠️ High: {high_count}
+- 💡 Total issues: {total_count}
+
+Consider addressing these before merging.
+{memory_section}
+""",
+    "minor": """
+## 💡 React Performance Review
+
+**Minor issues found: {total_count}**
+
+These are suggestions that may improve performance. Not blocking.
+{memory_section}
+""",
+}
+
+# Files with fewer changed lines than this are analyzed from the PR patch
+# alone (no contents fetch); files larger than MAX_FILE_CHARS are skipped
+PATCH_ONLY_MAX_CHANGES = 20
+MAX_FILE_CHARS = 200_000
+_HUNK_RE = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@')
+
+# GitHub rate-limit / transient-error retries
+MAX_TRIES = 5
+MAX_RETRY_WAIT = 60  # seconds
+_RATE_LIMIT_STATUSES = frozenset({403, 429})
+_TRANSIENT_STATUSES = frozenset({502, 503})
+
+# URL -> (ETag, body, next page URL, stored_at) for conditional GitHub GETs,
+# persisted across runs. Entries older than the TTL are dropped, and only the
+# most recently used ETAG_CACHE_MAX_ENTRIES are kept.
+ETAG_CACHE_PATH = Path.home() / ".cache" / "react-perf-guardian" / "etags.json"
+ETAG_CACHE_MAX_ENTRIES = 500
+ETAG_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _retry_wait(error: aiohttp.ClientResponseError, attempt: int, method: str) -> Optional[float]:
+    """
+    Seconds to wait before retrying a failed GitHub request, or None to give up.
+    
+    Rate-limited requests (429, or 403 carrying rate-limit headers) were never
+    processed, so any method is retried; 502/503 are only retried for GETs,
+    since a POST may already have gone through.
+    
+    Args:
+        error: The HTTP error raised by aiohttp
+        attempt: Zero-based attempt number
+        method: HTTP method of the failed request
+        
+    Returns:
+        Wait in seconds (backoff plus jitter, at least Retry-After) or None
+    """
+    headers = error.headers or {}
+    retry_after = headers.get("Retry-After")
+    reset = headers.get("X-RateLimit-Reset")
+    rate_limited = error.status == 429 or (
+        error.status == 403 and (retry_after or headers.get("X-RateLimit-Remaining") == "0")
+    )
+    
+    if not rate_limited and not (method == "GET" and error.status in _TRANSIENT_STATUSES):
+        return None
+    
+    # Server hint: Retry-After (seconds) or time until the rate-limit window resets
+    hint = 0.0
+    if retry_after and retry_after.isdigit():
+        hint = float(retry_after)
+    elif reset and reset.isdigit():
+        hint = max(float(reset) - time.time(), 0.0)
+    
+    # Exponential backoff with jitter so parallel file tasks don't retry in lockstep
+    backoff = min(2 ** attempt, MAX_RETRY_WAIT)
+    return min(max(hint, backoff), MAX_RETRY_WAIT) + random.uniform(0, 1)
+
+
+def _patch_to_fake_source(patch: str) -> str:
+    """
+    Rebuild the new side of a unified diff as source text.
+    
+    Added and context lines keep their line numbers in the new file (taken
+    from the hunk headers); lines outside the hunks are left blank so issue
+    line numbers still point at the right place for review comments.
+    
+    Args:
+        patch: The 'patch' field of a PR file
+        
+    Returns:
+        Source text with the patched lines at their original positions
+    """
+    lines: List[str] = []
+    for raw in patch.splitlines():
+        hunk = _HUNK_RE.match(raw)
+        if hunk:
+            # Pad up to the hunk's first new-file line (1-based)
+            lines.extend([""] * (int(hunk.group(1)) - 1 - len(lines)))
+        elif raw.startswith(("+", " ")):
+            lines.append(raw[1:])
+        # '-' (removed) and '\ No newline at end of file' lines are dropped
+    return "\n".join(lines)
+
 
 def parse_pr_url(url: str) -> Tuple[str, int]:
     """
@@ -39,10 +207,7 @@ def parse_pr_url(url: str) -> Tuple[str, int]:
     Raises:
         ValueError: If URL format is invalid
     """
-    # Pattern to match GitHub PR URLs
-    pattern = r'(?:https?://)?(?:www\.)?github\.com/([^/]+)/([^/]+)/pull/(\d+)'
-    
-    match = re.search(pattern, url)
+    match = _PR_URL_RE.search(url)
     if not match:
         raise ValueError(
             f"Invalid GitHub PR URL: {url}\n"
@@ -78,8 +243,155 @@ class GitHubPRAnalyzer:
                 "Repository required. Set GITHUB_REPOSITORY env var (format: owner/repo) "
                 "or pass repo argument"
             )
+        
+        # Shared keep-alive HTTP session, created lazily inside the event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # pr_number -> head commit SHA, fetched once per PR
+        self._head_sha_cache: Dict[int, str] = {}
+        
+        # Updated only from the event loop; saved at exit under _etag_lock
+        self._etag_cache: Dict[str, Tuple[str, str, str, float]] = self._load_etag_cache()
+        self._etag_lock = threading.Lock()
+        atexit.register(self._save_etag_cache)
+    
+    @staticmethod
+    def _load_etag_cache() -> Dict[str, Tuple[str, str, str, float]]:
+        """Load unexpired persisted ETags (a missing or corrupt cache starts empty)."""
+        try:
+            entries = loads_json(ETAG_CACHE_PATH.read_bytes())
+        except Exception:
+            return {}
+        cutoff = time.time() - ETAG_CACHE_TTL_SECONDS
+        return {
+            url: tuple(entry)
+            for url, entry in entries.items()
+            if len(entry) == 4 and entry[3] > cutoff
+        }
+    
+    def _save_etag_cache(self):
+        """
+        Persist the most recently used unexpired ETags for the next run.
+        
+        Entries another run saved meanwhile are merged in (newest wins), and
+        the file is replaced atomically so concurrent runs never read a
+        half-written cache.
+        """
+        with self._etag_lock:
+            try:
+                merged = self._load_etag_cache()
+                for url, entry in self._etag_cache.items():
+                    if url not in merged or merged[url][3] <= entry[3]:
+                        merged[url] = entry
+                newest = sorted(merged.items(), key=lambda item: item[1][3])[-ETAG_CACHE_MAX_ENTRIES:]
+                ETAG_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = ETAG_CACHE_PATH.with_name(f"{ETAG_CACHE_PATH.name}.{os.getpid()}.tmp")
+                tmp_path.write_text(dumps_json(dict(newest)))
+                os.replace(tmp_path, ETAG_CACHE_PATH)
+            except Exception as e:
+                logger.warning("⚠️  Could not save ETag cache: %s", e)
+    
+    @asynccontextmanager
+    async def _request(self, method: str, url: str, **kwargs):
+        """
+        Send a GitHub API request, retrying rate-limited and transient failures.
+        
+        Args:
+            method: HTTP method
+            url: GitHub API URL
+            **kwargs: Passed to aiohttp (headers, json, ...)
+            
+        Yields:
+            The successful aiohttp response
+        """
+        session = await self._ensure_session()
+        for attempt in range(MAX_TRIES):
+            try:
+                response = await session.request(method, url, **kwargs)
+                break
+            except aiohttp.ClientResponseError as e:
+                wait = _retry_wait(e, attempt, method)
+                if wait is None or attempt == MAX_TRIES - 1:
+                    raise
+                logger.warning("⏳ GitHub returned %s for %s, retrying in %.1fs", e.status, url, wait)
+                await asyncio.sleep(wait)
+        
+        try:
+            yield response
+        finally:
+            response.release()
+    
+    async def _get_cached_page(self, url: str, headers: Dict[str, str]) -> Tuple[object, Optional[str]]:
+        """
+        GET a JSON resource, revalidating with If-None-Match.
+        
+        A 304 reply carries no body, so unchanged resources are served from
+        the local cache.
+        
+        Args:
+            url: GitHub API URL
+            headers: Request headers
+            
+        Returns:
+            Tuple of (parsed JSON response, URL of the next page or None)
+        """
+        cached = self._etag_cache.get(url)
+        if cached:
+            headers = {**headers, "If-None-Match": cached[0]}
+        
+        async with self._request("GET", url, headers=headers) as response:
+            if response.status == 304 and cached:
+                # Still valid: refresh it so it outlives the TTL and the cap
+                self._etag_cache[url] = (*cached[:3], time.time())
+                return loads_json(cached[1]), cached[2] or None
+            body = await response.read()
+            etag = response.headers.get("ETag")
+            next_link = response.links.get("next")
+            next_url = str(next_link["url"]) if next_link else None
+        
+        if etag:
+            self._etag_cache[url] = (etag, body.decode(), next_url or "", time.time())
+        return loads_json(body), next_url
+    
+    async def _get_cached(self, url: str, headers: Dict[str, str]):
+        """GET a single (unpaginated) JSON resource through the ETag cache."""
+        data, _ = await self._get_cached_page(url, headers)
+        return data
+    
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=64, keepalive_timeout=30),
+                headers={"Authorization": f"Bearer {self.token}"},
+                raise_for_status=True,
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session (it is recreated if used again)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
-    def get_changed_files(self, pr_number: int) -> List[Dict[str, str]]:
+    async def get_head_sha(self, pr_number: int) -> str:
+        """
+        Return the PR head commit SHA, fetching it only once per PR.
+        
+        Args:
+            pr_number: Pull request number
+            
+        Returns:
+            Head commit SHA
+        """
+        if pr_number not in self._head_sha_cache:
+            pr_url = f"https://api.github.com/repos/{self.repo}/pulls/{pr_number}"
+            headers = {"Accept": "application/vnd.github.v3+json"}
+            pr = await self._get_cached(pr_url, headers)
+            self._head_sha_cache[pr_number] = pr['head']['sha']
+        return self._head_sha_cache[pr_number]
+    
+    async def get_changed_files(self, pr_number: int) -> List[Dict[str, str]]:
         """
         Fetch list of changed files in a PR
         
@@ -89,32 +401,28 @@ class GitHubPRAnalyzer:
         Returns:
             List of dicts with 'filename', 'status', 'patch'
         """
-        import requests
-        
-        url = f"https://api.github.com/repos/{self.repo}/pulls/{pr_number}/files"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
+        # 100 is the API maximum (default 30 silently truncates large PRs);
+        # follow Link rel="next" until every page is fetched
+        url = f"https://api.github.com/repos/{self.repo}/pulls/{pr_number}/files?per_page=100"
+        headers = {"Accept": "application/vnd.github.v3+json"}
         
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        files = response.json()
+        files = []
+        while url:
+            page, url = await self._get_cached_page(url, headers)
+            files.extend(page)
         
         # Filter for React/TS files only
-        react_extensions = {'.tsx', '.ts', '.jsx', '.js'}
         react_files = [
             f for f in files 
-            if Path(f['filename']).suffix in react_extensions
-            and f['status'] in ['added', 'modified']
+            if f['filename'].endswith(_REACT_EXTENSIONS)
+            and f['status'] in _VALID_STATUSES
         ]
         
-        print(f"📁 Found {len(files)} changed files, {len(react_files)} are React/TS files")
+        logger.info("📁 Found %s changed files, %s are React/TS files", len(files), len(react_files))
         
         return react_files
     
-    def fetch_file_content(self, filepath: str, ref: str = "HEAD", contents_url: str = None) -> str:
+    async def fetch_file_content(self, filepath: str, ref: str = "HEAD", contents_url: str = None) -> str:
         """
         Fetch file content from GitHub
         
@@ -126,46 +434,38 @@ class GitHubPRAnalyzer:
         Returns:
             File content as string
         """
-        import requests
-        
-        # Prefer contents_url if provided (reliable API endpoint for PR files)
-        if contents_url:
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Accept": "application/vnd.github.v3.raw"  # Get raw content directly
-            }
-            response = requests.get(contents_url, headers=headers)
-            response.raise_for_status()
-            return response.text
-        
-        # Fallback to constructing contents URL manually
-        url = f"https://api.github.com/repos/{self.repo}/contents/{filepath}?ref={ref}"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Accept": "application/vnd.github.v3.raw"
-        }
+        headers = {"Accept": "application/vnd.github.v3.raw"}  # Get raw content directly
         
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        # Prefer contents_url if provided (reliable API endpoint for PR files),
+        # fall back to constructing contents URL manually
+        url = contents_url or f"https://api.github.com/repos/{self.repo}/contents/{filepath}?ref={ref}"
         
-        return response.text
+        async with self._request("GET", url, headers=headers) as response:
+            return await response.text()
     
-    async def analyze_pr_file(self, filename: str, content: str, session_id: str, is_first_file: bool = True) -> Dict:
+    async def analyze_pr_file(
+        self,
+        filename: str,
+        content: str,
+        session_id: Optional[str] = None,
+        is_first_file: bool = True
+    ) -> Dict:
         """
         Analyze a single file using the React Performance Analyzer
         
         Args:
             filename: Name of the file
             content: File content
-            session_id: Session ID for this PR analysis (shared across all files)
+            session_id: Optional PR session ID; when given, a summary is stored
+                        there and the Memory Agent reads it for later files
             is_first_file: If True, skip Memory Agent (no history yet)
             
         Returns:
             Analysis results with issues
         """
-        from main import analyze_code
+        analyze_code = _get_analyze_code()
         
-        print(f"  🔍 Analyzing {filename}...")
+        logger.info("  🔍 Analyzing %s...", filename)
         
         try:
             # Run analysis with FRESH session for analyzer
@@ -181,25 +481,35 @@ class GitHubPRAnalyzer:
             
             # Debug: Show what we got
             if os.getenv('DEBUG_ANALYSIS'):
-                print(f"  [DEBUG] Raw response type: {type(result)}")
-                print(f"  [DEBUG] Raw response length: {len(result) if isinstance(result, str) else 'N/A'}")
-                print(f"  [DEBUG] First 500 chars: {result[:500] if isinstance(result, str) else result}")
+                logger.info("  [DEBUG] Raw response type: %s", type(result))
+                logger.info("  [DEBUG] Raw response length: %s", len(result) if isinstance(result, str) else 'N/A')
+                logger.info("  [DEBUG] First 500 chars: %s", result[:500] if isinstance(result, str) else result)
             
             # Check if result is empty
             if not result or (isinstance(result, str) and result.strip() == ""):
-                print(f"  ❌ Empty result for {filename}")
+                logger.error("  ❌ Empty result for %s", filename)
                 return {
                     "filename": filename,
                     "success": False,
                     "error": "Empty analysis result (file may be too large or complex)"
                 }
             
+            # Fast path: a bare JSON object (what format_report returns) needs
+            # no error sniffing, fence stripping or regex extraction
+            if isinstance(result, str):
+                try:
+                    result = loads_json(result)
+                    logger.info("  ✅ Parsed response successfully")
+                except json.JSONDecodeError:
+                    pass
+            
             # Check if result is an error message from the agent
             if isinstance(result, str):
-                error_indicators = ["I'm sorry", "error", "failed", "cannot parse", "unable to"]
-                if any(indicator.lower() in result.lower()[:100] for indicator in error_indicators):
-                    if not result.strip().startswith('{'):
-                        print(f"  ⚠️  Agent reported error: {result[:100]}...")
+                # Only the first 100 chars are inspected: lowercase just those
+                prefix = result[:100].lower()
+                if any(indicator in prefix for indicator in _ERROR_INDICATORS):
+                    if not result.lstrip().startswith('{'):
+                        logger.warning("  ⚠️  Agent reported error: %s...", result[:100])
                         return {
                             "filename": filename,
                             "success": True,
@@ -217,7 +527,7 @@ class GitHubPRAnalyzer:
                     # Handle various markdown fence formats
                     if '```' in cleaned_result:
                         # Method 1: JSON on same line as fence (```json {...} ```)
-                        fence_match = re.search(r'```(?:json)?\s*(\{[\s\S]*?\})\s*```', cleaned_result)
+                        fence_match = _FENCE_RE.search(cleaned_result)
                         if fence_match:
                             cleaned_result = fence_match.group(1)
                         else:
@@ -229,20 +539,20 @@ class GitHubPRAnalyzer:
                                 lines = lines[:-1]
                             cleaned_result = '\n'.join(lines)
                     
-                    result = json.loads(cleaned_result)
-                    print(f"  ✅ Parsed response successfully")
+                    result = loads_json(cleaned_result)
+                    logger.info("  ✅ Parsed response successfully")
                 except json.JSONDecodeError as e:
-                    print(f"  ⚠️  Agent returned text instead of JSON, attempting extraction...")
+                    logger.warning("  ⚠️  Agent returned text instead of JSON, attempting extraction...")
                     
                     # Try to find JSON embedded in the text
-                    json_match = re.search(r'\{[\s\S]*"issues"[\s\S]*\}', result)
+                    json_match = _JSON_OBJ_RE.search(result)
                     if json_match:
                         try:
-                            result = json.loads(json_match.group(0))
-                            print(f"  ✅ Extracted JSON successfully")
+                            result = loads_json(json_match.group(0))
+                            logger.info("  ✅ Extracted JSON successfully")
                         except:
-                            print(f"  ❌ Could not extract valid JSON")
-                            print(f"     First 200 chars: {result[:200]}")
+                            logger.error("  ❌ Could not extract valid JSON")
+                            logger.error("     First 200 chars: %s", result[:200])
                             # Return empty result instead of failing
                             return {
                                 "filename": filename,
@@ -252,8 +562,8 @@ class GitHubPRAnalyzer:
                                 "error": "Agent output was not JSON"
                             }
                     else:
-                        print(f"  ⚠️  No JSON found in response, returning empty result")
-                        print(f"     Response: {result[:300]}")
+                        logger.warning("  ⚠️  No JSON found in response, returning empty result")
+                        logger.warning("     Response: %s", result[:300])
                         # Return empty result
                         return {
                             "filename": filename,
@@ -264,21 +574,22 @@ class GitHubPRAnalyzer:
                         }
             
             issues = result.get("issues", [])
-            print(f"  📊 Found {len(issues)} potential issues")
-            
-            # Memory Agent handles cross-file insights via session history
-            # Issues are stored in the session automatically
+            logger.info("  📊 Found %s potential issues", len(issues))
             
-            return {
+            analysis = {
                 "filename": filename,
                 "success": True,
                 "issues": issues,
                 "summary": result.get("summary", {})
             }
+            # Partially unreadable report: keep what parsed, but don't pass it off as complete
+            if analysis["summary"].get("status") == INVALID_REPORT_STATUS:
+                logger.warning("  ⚠️  %s for %s", INVALID_REPORT_STATUS, filename)
+                analysis["error"] = INVALID_REPORT_STATUS
+            return analysis
         except Exception as e:
-            print(f"  ❌ Error analyzing {filename}: {str(e)}")
-            import traceback
-            print(f"     Traceback: {traceback.format_exc()[:200]}")
+            logger.error("  ❌ Error analyzing %s: %s", filename, e)
+            logger.error("     Traceback: %s", traceback.format_exc()[:200])
             return {
                 "filename": filename,
                 "success": False,
@@ -287,9 +598,13 @@ class GitHubPRAnalyzer:
     
     async def analyze_pr(self, pr_number: int) -> Dict:
         """
-        Analyze all React files in a PR using DatabaseSessionService + Memory Agent.
+        Analyze all React files in a PR concurrently.
         
-        The Memory Agent reads session history to extract patterns for cross-file insights.
+        Every file is analyzed with the same (empty) memory context, so a
+        file's report, and its cache key, don't depend on which other files
+        happened to finish first. Each file still stores a short summary in
+        the PR session; cross-file insights (recurring issues, conventions)
+        are collected in one pass over all file results at the end.
         
         Args:
             pr_number: Pull request number
@@ -297,72 +612,111 @@ class GitHubPRAnalyzer:
         Returns:
             Combined analysis results with project-wide insights
         """
-        print(f"\n🚀 Analyzing PR #{pr_number} in {self.repo}")
-        print("=" * 60)
+        logger.info("\n🚀 Analyzing PR #%s in %s", pr_number, self.repo)
+        logger.info("=" * 60)
         
-        # Create ONE session ID for entire PR analysis
-        # All files share this session - Memory Agent reads history between files
+        # ONE session ID identifies the entire PR analysis
         session_id = f"pr-{self.repo.replace('/', '-')}-{pr_number}"
-        print(f"📝 Session ID: {session_id}")
-        print("🧠 Memory Agent will extract patterns from session history")
+        logger.info("📝 Session ID: %s", session_id)
         
-        # Get changed files
-        changed_files = self.get_changed_files(pr_number)
+        # Get changed files (the head SHA is only fetched if a review is posted)
+        try:
+            changed_files = await self.get_changed_files(pr_number)
+        except BaseException:
+            await self.close()
+            raise
         
         if not changed_files:
-            print("✅ No React/TypeScript files changed in this PR")
+            logger.info("✅ No React/TypeScript files changed in this PR")
             return {
                 "pr_number": pr_number,
                 "files_analyzed": 0,
                 "results": []
             }
         
-        # Analyze each file with shared session
-        results = []
-        all_issues = []
+        # Analyze files concurrently. Files are independent: cross-file patterns
+        # come from one pass over all results at the end, not from a Memory
+        # Agent call per file. Contents are prefetched so GitHub fetch latency
+        # hides behind the (much longer) LLM analysis.
+        fetch_sem = asyncio.Semaphore(MAX_CONCURRENT_FILES)
+        analyze_sem = asyncio.Semaphore(MAX_CONCURRENT_FILES)
         
-        for i, file_info in enumerate(changed_files):
+        async def _fetch(file_info: Dict) -> Optional[str]:
             filename = file_info['filename']
-            contents_url = file_info.get('contents_url')
-            is_first_file = (i == 0)  # Only first file skips Memory Agent
-            
-            # Fetch file content
-            try:
-                content = self.fetch_file_content(filename, ref=f"pull/{pr_number}/head", contents_url=contents_url)
-            except Exception as e:
-                print(f"  ❌ Could not fetch {filename}: {str(e)}")
-                continue
+            async with fetch_sem:
+                try:
+                    return await self.fetch_file_content(
+                        filename,
+                        ref=f"pull/{pr_number}/head",
+                        contents_url=file_info.get('contents_url')
+                    )
+                except Exception as e:
+                    logger.error("  ❌ Could not fetch %s: %s", filename, e)
+                    return None
+        
+        async def _process_file(file_info: Dict, fetch: Optional[asyncio.Task]) -> Optional[Dict]:
+            filename = file_info['filename']
+            if fetch is None:
+                # Small diff: the patch is enough context, skip the contents fetch
+                content = _patch_to_fake_source(file_info['patch'])
+            else:
+                content = await fetch
+            if content is None:
+                return None
+            if len(content) > MAX_FILE_CHARS:
+                logger.warning("  ⏭️  Skipping %s (%s chars, likely generated)", filename, len(content))
+                return None
             
-            # Analyze file with shared session ID
-            # Memory Agent runs automatically for subsequent files
-            analysis = await self.analyze_pr_file(
-                filename, 
-                content, 
-                session_id=session_id, 
-                is_first_file=is_first_file
+            async with analyze_sem:
+                # is_first_file for every file: no Memory Agent context
+                return await self.analyze_pr_file(
+                    filename, content, session_id=session_id, is_first_file=True
+                )
+        
+        fetches = [
+            None if f.get('patch') and f.get('changes', 0) < PATCH_ONLY_MAX_CHANGES
+            else asyncio.create_task(_fetch(f))
+            for f in changed_files
+        ]
+        try:
+            analyses = await asyncio.gather(
+                *(_process_file(f, fetch) for f, fetch in zip(changed_files, fetches)),
+                return_exceptions=True
             )
-            results.append(analysis)
-            
-            # Collect issues for summary
-            if analysis.get("success") and analysis.get("issues"):
-                all_issues.extend(analysis["issues"])
+        finally:
+            for fetch in fetches:
+                if fetch is not None:
+                    fetch.cancel()
+            await self.close()
         
-        # Combine results
-        total_issues = len(all_issues)
+        results = []
+        for file_info, analysis in zip(changed_files, analyses):
+            if isinstance(analysis, BaseException):
+                logger.error("  ❌ Error analyzing %s: %s", file_info['filename'], analysis)
+                continue
+            if analysis is None:
+                continue
+            results.append(analysis)
         
-        # Count issue types for project insights
-        issue_types = {}
-        for issue in all_issues:
-            issue_type = issue.get("title", "unknown")
-            issue_types[issue_type] = issue_types.get(issue_type, 0) + 1
+        # Count issue types for project insights (single pass, no combined list)
+        issue_types = Counter(
+            issue.get("title", "unknown")
+            for analysis in results
+            if analysis.get("success")
+            for issue in analysis.get("issues") or ()
+        )
+        total_issues = sum(issue_types.values())
         
-        print("=" * 60)
-        print(f"✅ Analysis complete: {len(results)} files, {total_issues} issues found")
+        logger.info("=" * 60)
+        logger.info("✅ Analysis complete: %s files, %s issues found", len(results), total_issues)
         
         # Show recurring issues
-        recurring = {k: v for k, v in issue_types.items() if v >= 2}
+        recurring = {k: v for k, v in issue_types.most_common() if v >= 2}
         if recurring:
-            print(f"⚠️  Recurring issues: {', '.join(f'{k} ({v}x)' for k, v in recurring.items())}")
+            logger.warning("⚠️  Recurring issues: %s", ', '.join(f'{k} ({v}x)' for k, v in recurring.items()))
+        
+        # Cross-file insights in a single batch pass (replaces per-file Memory Agent runs)
+        insights = summarize_cross_file_patterns(results)
         
         # Clear the database file to prevent cross-PR pollution
         self._cleanup_session_db()
@@ -373,23 +727,22 @@ class GitHubPRAnalyzer:
             "results": results,
             "total_issues": total_issues,
             "recurring_issues": recurring,
-            "issue_breakdown": issue_types,
+            "issue_breakdown": dict(issue_types),
+            "recurring_warning": insights["recurring_warning"],
+            "detected_conventions": insights["detected_conventions"],
             "session_id": session_id
         }
     
     def _cleanup_session_db(self):
-        """Clean up the session database after PR analysis."""
-        import os
-        from pathlib import Path
-        db_path = Path(__file__).parent / "pr_sessions.db"
+        """Clean up the session database (and its WAL files) after PR analysis."""
+        from main import close_session_db
         try:
-            if db_path.exists():
-                os.remove(db_path)
-                print(f"🗑️  Cleared session database")
+            close_session_db()
+            logger.info("🗑️  Cleared session database")
         except Exception as e:
-            print(f"⚠️  Could not clear session DB: {e}")
+            logger.warning("⚠️  Could not clear session DB: %s", e)
     
-    def post_review_comment(
+    async def post_review_comment(
         self, 
         pr_number: int, 
         filepath: str, 
@@ -400,6 +753,10 @@ class GitHubPRAnalyzer:
         """
         Post an inline review comment on a specific line
         
+        For ad-hoc use only: each call is a separate API request. Reviews
+        with several findings go through create_review, which posts every
+        comment in one request.
+        
         Args:
             pr_number: Pull request number
             filepath: Path to file in repo
@@ -410,24 +767,13 @@ class GitHubPRAnalyzer:
         Returns:
             API response
         """
-        import requests
+        headers = {"Accept": "application/vnd.github.v3+json"}
         
-        # Get PR details to find latest commit if not provided
+        # Use the PR head commit if not provided
         if not commit_id:
-            pr_url = f"https://api.github.com/repos/{self.repo}/pulls/{pr_number}"
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Accept": "application/vnd.github.v3+json"
-            }
-            pr_response = requests.get(pr_url, headers=headers)
-            pr_response.raise_for_status()
-            commit_id = pr_response.json()['head']['sha']
+            commit_id = await self.get_head_sha(pr_number)
         
         url = f"https://api.github.com/repos/{self.repo}/pulls/{pr_number}/comments"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
         
         data = {
             "body": body,
@@ -437,17 +783,16 @@ class GitHubPRAnalyzer:
             "side": "RIGHT"  # Comment on the new version
         }
         
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        return response.json()
+        async with self._request("POST", url, headers=headers, json=data) as response:
+            return loads_json(await response.read())
     
-    def create_review(
+    async def create_review(
         self, 
         pr_number: int, 
         comments: List[Dict],
         event: str = "COMMENT",
-        body: Optional[str] = None
+        body: Optional[str] = None,
+        commit_id: Optional[str] = None
     ) -> Dict:
         """
         Create a comprehensive PR review with multiple comments
@@ -460,21 +805,16 @@ class GitHubPRAnalyzer:
                 - body: Comment text
             event: Review event type - "APPROVE", "REQUEST_CHANGES", or "COMMENT"
             body: Overall review summary (optional)
+            commit_id: Specific commit SHA (optional, uses PR head if not provided)
             
         Returns:
             API response
         """
-        import requests
+        headers = {"Accept": "application/vnd.github.v3+json"}
         
         # Get PR head commit
-        pr_url = f"https://api.github.com/repos/{self.repo}/pulls/{pr_number}"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        pr_response = requests.get(pr_url, headers=headers)
-        pr_response.raise_for_status()
-        commit_id = pr_response.json()['head']['sha']
+        if not commit_id:
+            commit_id = await self.get_head_sha(pr_number)
         
         url = f"https://api.github.com/repos/{self.repo}/pulls/{pr_number}/reviews"
         
@@ -496,10 +836,40 @@ class GitHubPRAnalyzer:
             "comments": formatted_comments
         }
         
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
+        async with self._request("POST", url, headers=headers, json=data) as response:
+            return loads_json(await response.read())
+    
+    @staticmethod
+    def _build_memory_section(analysis: Dict) -> str:
+        """
+        Build the project-wide insights section of the review summary.
         
-        return response.json()
+        Args:
+            analysis: Result of analyze_pr (recurring_warning, detected_conventions)
+            
+        Returns:
+            Markdown section to append to the review summary
+        """
+        recurring_warning = analysis.get("recurring_warning")
+        conventions = analysis.get("detected_conventions")
+        
+        parts = ["\n\n---\n\n### 🧠 Project-Wide Insights\n\n"]
+        
+        if recurring_warning:
+            parts.append(f"**⚠️ Recurring Pattern Detected:**\n{recurring_warning}\n\n")
+            parts.append("Consider implementing a project-wide solution:\n")
+            parts.append("- Add ESLint rules (e.g., `react-perf/jsx-no-new-function-as-prop`)\n")
+            parts.append("- Create utility hooks (e.g., `useStableCallback`)\n")
+            parts.append("- Team training on React.memo patterns\n\n")
+        
+        if conventions:
+            parts.append("**Detected Conventions:**\n")
+            parts.extend(
+                f"- {key.replace('_', ' ').title()}: `{value}`\n"
+                for key, value in conventions.items()
+            )
+        
+        return "".join(parts)
     
     async def analyze_and_review(
         self, 
@@ -518,16 +888,16 @@ class GitHubPRAnalyzer:
         Returns:
             Review results
         """
-        print(f"\n🎯 Analyzing and reviewing PR #{pr_number}")
-        print(f"   Severity threshold: {severity_threshold}")
-        print(f"   Auto-approve: {auto_approve}")
-        print("=" * 60)
+        logger.info("\n🎯 Analyzing and reviewing PR #%s", pr_number)
+        logger.info("   Severity threshold: %s", severity_threshold)
+        logger.info("   Auto-approve: %s", auto_approve)
+        logger.info("=" * 60)
         
         # Analyze PR
         analysis = await self.analyze_pr(pr_number)
         
         if analysis["files_analyzed"] == 0:
-            print("✅ No files to analyze, skipping review")
+            logger.info("✅ No files to analyze, skipping review")
             return analysis
         
         # Filter issues by severity
@@ -590,92 +960,47 @@ class GitHubPRAnalyzer:
                     "body": comment_body.strip()
                 })
         
-        # Build memory insights section
-        memory_section = ""
-        recurring_warning = analysis.get("recurring_warning")
-        conventions = analysis.get("detected_conventions", {})
-        
-        if recurring_warning or conventions:
-            memory_section = "\n\n---\n\n### 🧠 Project-Wide Insights\n\n"
+        # Post review: all comments go out in ONE create_review request
+        # (never one post_review_comment call per finding). With no comments
+        # nothing is posted, so the head SHA is never fetched.
+        if review_comments:
+            # Pick review event + summary template in one pass; nothing is
+            # formatted when there are no comments to post
+            if critical_count > 0:
+                event, template_key = "REQUEST_CHANGES", "critical"
+            elif high_count > 0 and not auto_approve:
+                event, template_key = "COMMENT", "high"
+            else:
+                event = "APPROVE" if auto_approve else "COMMENT"
+                template_key = "minor"
             
-            if recurring_warning:
-                memory_section += f"**⚠️ Recurring Pattern Detected:**\n{recurring_warning}\n\n"
-                memory_section += "Consider implementing a project-wide solution:\n"
-                memory_section += "- Add ESLint rules (e.g., `react-perf/jsx-no-new-function-as-prop`)\n"
-                memory_section += "- Create utility hooks (e.g., `useStableCallback`)\n"
-                memory_section += "- Team training on React.memo patterns\n\n"
+            # Only build the insights section when there are insights to show
+            memory_section = (
+                self._build_memory_section(analysis)
+                if analysis.get("recurring_warning") or analysis.get("detected_conventions")
+                else ""
+            )
             
-            if conventions:
-                memory_section += "**Detected Conventions:**\n"
-                for key, value in conventions.items():
-                    memory_section += f"- {key.replace('_', ' ').title()}: `{value}`\n"
-        
-        # Determine review event
-        if critical_count > 0:
-            event = "REQUEST_CHANGES"
-            review_summary = f"""
-## 🚨 React Performance Review
-
-**Critical issues found: {critical_count}**
-
-This PR has {critical_count} critical performance issue(s) that should be addressed.
-
-**Summary:**
-- 🚨 Critical: {critical_count}
-- ⚠️ High: {high_count}
-- 💡 Total issues: {len(review_comments)}
-
-Please review the inline comments for details.
-{memory_section}
-"""
-        elif high_count > 0 and not auto_approve:
-            event = "COMMENT"
-            review_summary = f"""
-## ⚠️ React Performance Review
-
-**High-priority issues found: {high_count}**
-
-**Summary:**
-- ⚠️ High: {high_count}
-- 💡 Total issues: {len(review_comments)}
-
-Consider addressing these before merging.
-{memory_section}
-"""
-        elif len(review_comments) > 0:
-            event = "APPROVE" if auto_approve else "COMMENT"
-            review_summary = f"""
-## 💡 React Performance Review
-
-**Minor issues found: {len(review_comments)}**
-
-These are suggestions that may improve performance. Not blocking.
-{memory_section}
-"""
-        else:
-            event = "APPROVE" if auto_approve else "COMMENT"
-            review_summary = f"""
-## ✅ React Performance Review
-
-No performance issues detected! Great work! 🎉
-{memory_section}
-"""
-        
-        # Post review
-        if review_comments:
-            print(f"\n📝 Posting review with {len(review_comments)} comments...")
-            print(f"   Event: {event}")
+            review_summary = _REVIEW_TEMPLATES[template_key].format(
+                critical_count=critical_count,
+                high_count=high_count,
+                total_count=len(review_comments),
+                memory_section=memory_section
+            )
+            
+            logger.info("\n📝 Posting review with %s comments...", len(review_comments))
+            logger.info("   Event: %s", event)
             
             try:
-                review_response = self.create_review(
+                review_response = await self.create_review(
                     pr_number=pr_number,
                     comments=review_comments,
                     event=event,
                     body=review_summary
                 )
                 
-                print(f"✅ Review posted successfully!")
-                print(f"   Review ID: {review_response.get('id')}")
+                logger.info("✅ Review posted successfully!")
+                logger.info("   Review ID: %s", review_response.get('id'))
                 
                 return {
                     **analysis,
@@ -685,14 +1010,16 @@ No performance issues detected! Great work! 🎉
                     "comments_posted": len(review_comments)
                 }
             except Exception as e:
-                print(f"❌ Error posting review: {str(e)}")
+                logger.error("❌ Error posting review: %s", e)
                 return {
                     **analysis,
                     "review_posted": False,
                     "error": str(e)
                 }
+            finally:
+                await self.close()
         else:
-            print("✅ No issues to report")
+            logger.info("✅ No issues to report")
             return {
                 **analysis,
                 "review_posted": False,
@@ -702,7 +1029,9 @@ No performance issues detected! Great work! 🎉
 
 async def main():
     """CLI entry point for manual PR analysis"""
-    import sys
+    # Progress goes through logging (no per-line stdout lock/flush from
+    # concurrent file tasks); keep the plain emoji output format
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
     
     if len(sys.argv) < 2:
         print("""
@@ -793,7 +1122,7 @@ Examples:
         # Just analyze, don't post
         result = await analyzer.analyze_pr(pr_number)
         print("\n📊 Analysis Results:")
-        print(json.dumps(result, indent=2))
+        print(dumps_json(result, indent=True))
     else:
         # Analyze and post review
         result = await analyzer.analyze_and_review(
@@ -802,9 +1131,10 @@ Examples:
             auto_approve=auto_approve
         )
         print("\n📊 Final Results:")
-        print(json.dumps(result, indent=2, default=str))
+        print(dumps_json(result, indent=True, default=str))
 
 
 if __name__ == "__main__":
+    install_fast_event_loop()
     asyncio.run(main())
 
@@ -0,0 +1,100 @@
+"""
+Hedged Gemini requests.
+
+Gemini latency has a fat tail: most calls finish in a few seconds, but a
+slow-but-succeeding call can take minutes, and retry-on-error never fires
+for it. HedgedGemini re-issues a non-streaming request once the original has
+been running longer than the rolling p95 of recent calls, keeps whichever
+copy answers first and cancels the other.
+
+Every request, the hedged copy included, first takes a token from the
+process-wide GEMINI_RPM limiter, so a multi-agent pipeline's several model
+calls per file all count against the configured rate.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import AsyncGenerator
+
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import PrivateAttr
+
+from utils import AsyncRateLimiter
+
+# Latency samples needed before the rolling p95 replaces the default delay
+MIN_SAMPLES = 20
+
+# Process-wide cap on Gemini requests per minute (GEMINI_RPM, match your API
+# tier), shared by every HedgedGemini instance. PERF_CONCURRENCY bounds how
+# many pipelines run at once; this bounds the request rate, so a large
+# multi-file scan doesn't trip 429s and stall in retry backoff.
+GEMINI_RPM = AsyncRateLimiter(int(os.getenv("GEMINI_RPM", "60")), 60)
+
+
+class HedgedGemini(Gemini):
+    """Gemini model that hedges slow non-streaming requests."""
+
+    hedge_after_seconds: float = 10.0
+    """Hedge delay used until enough latency samples have been collected."""
+
+    min_hedge_seconds: float = 1.0
+    """Never hedge earlier than this, even if recent calls were very fast."""
+
+    _latencies: deque = PrivateAttr(default_factory=lambda: deque(maxlen=100))
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait before firing the backup request (rolling p95)."""
+        if len(self._latencies) < MIN_SAMPLES:
+            return self.hedge_after_seconds
+        ordered = sorted(self._latencies)
+        p95 = ordered[int(len(ordered) * 0.95) - 1]
+        return max(p95, self.min_hedge_seconds)
+
+    async def _collect(self, llm_request: LlmRequest) -> list[LlmResponse]:
+        responses = []
+        async for response in super().generate_content_async(llm_request):
+            responses.append(response)
+        return responses
+
+    async def _collect_backup(self, llm_request: LlmRequest) -> list[LlmResponse]:
+        # The hedge is a real second request: it needs its own token
+        await GEMINI_RPM.acquire()
+        return await self._collect(llm_request)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        await GEMINI_RPM.acquire()
+        if stream:
+            # Streamed output is already visible to the user; don't duplicate it
+            async for response in super().generate_content_async(llm_request, stream=True):
+                yield response
+            return
+
+        started = time.monotonic()
+        backup_request = llm_request.model_copy(deep=True)
+        pending = {asyncio.create_task(self._collect(llm_request))}
+
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_delay())
+            if not done:
+                pending.add(asyncio.create_task(self._collect_backup(backup_request)))
+
+            # First successful copy wins; only fail once every copy has failed
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((t for t in done if t.exception() is None), None)
+                if winner or not pending:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        responses = (winner or done.pop()).result()
+        self._latencies.append(time.monotonic() - started)
+        for response in responses:
+            yield response
@@ -1,15 +1,19 @@
 import asyncio
+import functools
+import itertools
 import os
+import time
+from collections import Counter
+from contextlib import aclosing
 from pathlib import Path
+from types import SimpleNamespace
 from dotenv import load_dotenv
-from agents import performance_analyzer, memory_agent, sequential_analyzer
-from google.genai import types
-from google.adk.agents import Agent
-from google.adk.sessions import DatabaseSessionService
-from google.adk.runners import Runner, Event
-from google.genai.types import Content, Part
-import uuid
-import json
+from result_cache import result_key, get_cached_result, store_result
+from utils import dumps_json, install_fast_event_loop
+
+# The agent stack (google.adk, google.genai, agents.py) takes seconds to
+# import, so it is loaded on first use by load_pipeline() / inside the
+# functions that need it: usage errors and result-cache hits never pay for it.
 
 # Load environment variables from .env file
 load_dotenv()
@@ -19,89 +23,328 @@ APP_NAME = "react-perf-analyzer"
 # =============================================================================
 # AGENT MODE CONFIGURATION
 # =============================================================================
-# Set USE_MULTI_AGENT=true to use the 4-agent sequential pipeline:
-#   Parser → Analyzer → Reasoner → Reporter
-# Set USE_MULTI_AGENT=false (default) to use the single comprehensive agent
-# 
+# Set USE_MULTI_AGENT=false (default) to use the single fused agent, which runs
+#   parse → analyze → reason inside one conversation
+# Set USE_MULTI_AGENT=true to use the legacy sequential pipeline:
+#   Parser → Analyzer → Reasoner
+#
+# Either way the agents return issues JSON and the report is rendered locally
+# with format_report() - no LLM round-trip just to call a formatter.
+#
 # The multi-agent approach demonstrates:
 #   - SequentialAgent orchestration (ADK feature)
 #   - Specialized agents with focused responsibilities
 #   - Agent-to-agent communication via session context
 #
-# The single-agent approach is:
+# The fused single-agent approach is:
 #   - More reliable for consistent JSON output
 #   - Easier to debug
-#   - Faster (single model call vs. 4 sequential calls)
+#   - Faster (one conversation instead of 3 sequential agent hand-offs,
+#     no re-serialization of issues between agents)
 # =============================================================================
-USE_MULTI_AGENT = os.environ.get("USE_MULTI_AGENT", "true").lower() == "true"
-
-# Select the appropriate analyzer based on configuration
-if USE_MULTI_AGENT:
-    active_analyzer = sequential_analyzer
-    print("🔗 Using MULTI-AGENT pipeline: Parser → Analyzer → Reasoner → Reporter")
-else:
-    active_analyzer = performance_analyzer
-    print("⚡ Using SINGLE comprehensive agent (set USE_MULTI_AGENT=true for multi-agent)")
+USE_MULTI_AGENT = os.environ.get("USE_MULTI_AGENT", "false").lower() == "true"
+
 MEMORY_APP_NAME = "react-perf-memory"  # Separate app name for memory agent
 USER_ID = "react-perf-user"  # Fixed user ID for all analyses
 
-# Validate API key is present
-if not os.getenv('GOOGLE_API_KEY'):
-    print("❌ Error: GOOGLE_API_KEY not found!")
-    print("📝 Please create a .env file with your API key:")
-    print("   echo 'GOOGLE_API_KEY=your-key-here' > .env")
-    print("🔑 Get your key from: https://makersuite.google.com/app/apikey")
-    exit(1)
+DEBUG_EVENTS = os.environ.get("DEBUG_EVENTS", "").lower() == "true"
+
+# Analyzer session IDs: per-process run ID + counter (no urandom syscall per
+# file). The start time keeps IDs unique across runs sharing pr_sessions.db
+# even if a PID is reused.
+_RUN_ID = f"{os.getpid():x}{int(time.time()):x}"
+_SESSION_COUNTER = itertools.count()
+
+# Gemini context caching: the agent instruction, tool declarations and the
+# static prompt prefix are identical for every file, so the tool-calling turns
+# of an analysis reuse one cached prefix instead of resending it each turn
+PROMPT_CACHE_MIN_TOKENS = 2048
+
+# Invariant part of the analysis prompt. Keep per-file text (filename, code,
+# memory context) OUT of this so it stays byte-identical and cacheable.
+ANALYSIS_PROMPT_PREFIX = """
+Analyze the React code below for performance issues.
+
+IMPORTANT: The final output MUST be valid JSON ({"issues": [...], "summary": {...}}) only - no explanations or additional text.
+
+Follow this pipeline:
+1. Parse: Parse the code to extract AST data
+2. Analyze: Identify performance issues using the tools
+3. Reason: Validate issues and create structured issue objects with:
+   - file: <the File given below>
+   - line: <line_number>
+   - component: <component_name>
+   - severity: "critical"|"high"|"medium"|"low"
+   - title: <brief_title>
+   - problem: <description>
+   - suggestion: <how_to_fix>
+
+Focus on:
+- Critical: Inline functions/objects breaking memoization
+- High: Unstable hook dependencies
+- Medium: Unnecessary re-renders
+- Low: Minor optimizations
+
+The final response must be ONLY the issues JSON - no explanations.
+"""
+
+# Cap on memory context spliced into each prompt: keep the head (conventions)
+# and the tail (most recent issues) so prompt size doesn't grow with PR size
+_MEMORY_CTX_MAX = 4000
+_MEMORY_CTX_HEAD = 1000
+_MEMORY_CTX_TAIL = 2000
+
+# Per-file prompt, built once at import and filled with str.format (values
+# are not re-parsed, so braces in the code are safe)
+_PROMPT_TEMPLATE = """{prefix}
+File: {filename}
+
+```tsx
+{code}
+```
+{memory_prompt}"""
+
+# Small files are analyzed several to a prompt (one pipeline run instead of
+# one per file); the report is split back per file on the issues' "file"
+GROUP_MAX_CHARS = int(os.getenv("PERF_GROUP_MAX_CHARS", "4000"))  # 0 disables
+
+_GROUP_PROMPT_TEMPLATE = """{prefix}
+Analyze each of the files below. Set every issue's "file" to the file it was found in.
+{file_blocks}
+{memory_prompt}"""
+
+_GROUP_FILE_TEMPLATE = """
+## File: {filename}
+
+```tsx
+{code}
+```
+"""
+
+_MEMORY_PROMPT_TEMPLATE = """
+
+## 🧠 PROJECT MEMORY (Cross-File Context)
+
+You have access to information from previous files analyzed in this PR:
+{memory_context}
+
+Use this context to:
+- Prioritize recurring issues higher (if you see the same pattern again)
+- Provide convention-aware suggestions (e.g., "This project uses Redux, so...")
+- Recognize project-wide patterns that need systemic fixes
+- Give context about how many times you've seen similar issues
+"""
 
 # Use DatabaseSessionService for persistent cross-file memory
 db_path = Path(__file__).parent / "pr_sessions.db"
 db_url = f"sqlite:///{db_path}"
-session_service = DatabaseSessionService(db_url=db_url)
 
-print(f"🗄️  Using persistent sessions: {db_path}")
-print(f"🧠 Memory Agent will extract patterns from session history")
+# Applied to every session DB connection. WAL lets memory-agent reads run
+# alongside summary writes; busy_timeout makes concurrent analyses wait for
+# the write lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """SQLAlchemy "connect" hook tuning each new session DB connection."""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+@functools.lru_cache(maxsize=None)
+def load_pipeline() -> SimpleNamespace:
+    """
+    Import the agent stack and build the shared services, once.
+    
+    Returns:
+        Namespace with active_analyzer, final_author, memory_agent, analyzer_app
+        and session_service
+    """
+    # Validate API key is present
+    if not os.getenv('GOOGLE_API_KEY'):
+        print("❌ Error: GOOGLE_API_KEY not found!")
+        print("📝 Please create a .env file with your API key:")
+        print("   echo 'GOOGLE_API_KEY=your-key-here' > .env")
+        print("🔑 Get your key from: https://makersuite.google.com/app/apikey")
+        exit(1)
+    
+    from agents import performance_analyzer, memory_agent, sequential_analyzer
+    from google.adk.agents.context_cache_config import ContextCacheConfig
+    from google.adk.apps import App
+    from google.adk.sessions import DatabaseSessionService
+    from sqlalchemy import event
+    
+    # Select the appropriate analyzer based on configuration
+    if USE_MULTI_AGENT:
+        active_analyzer = sequential_analyzer
+        print("🔗 Using MULTI-AGENT pipeline: Parser → Analyzer → Reasoner")
+    else:
+        active_analyzer = performance_analyzer
+        print("⚡ Using SINGLE fused agent (set USE_MULTI_AGENT=true for multi-agent)")
+    
+    analyzer_app = App(
+        name=APP_NAME,
+        root_agent=active_analyzer,
+        context_cache_config=ContextCacheConfig(
+            ttl_seconds=3600,
+            min_tokens=PROMPT_CACHE_MIN_TOKENS,
+        ),
+    )
+    session_service = DatabaseSessionService(db_url=db_url)
+    engine = session_service.db_engine
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    # The service already opened a connection to create its tables; drop it
+    # so every pooled connection is opened with the pragmas
+    engine.dispose()
+    
+    print(f"🗄️  Using persistent sessions: {db_path}")
+    if USE_LLM_MEMORY:
+        print("🧠 Memory Agent will extract patterns from session history")
+    else:
+        print("🧠 Memory context computed from stored file summaries (USE_LLM_MEMORY=true for the Memory Agent)")
+    
+    return SimpleNamespace(
+        active_analyzer=active_analyzer,
+        # The agent whose final response is the pipeline's answer (the last
+        # stage of a SequentialAgent - every stage emits a "final" response)
+        final_author=(active_analyzer.sub_agents or [active_analyzer])[-1].name,
+        memory_agent=memory_agent,
+        analyzer_app=analyzer_app,
+        session_service=session_service,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_runner(app_name: str):
+    """
+    Return the shared Runner for an app, built on first use.
+    
+    Runners are stateless between calls (sessions live in session_service),
+    so one per app is reused instead of rebuilding the agent graph per file.
+    
+    Args:
+        app_name: APP_NAME for the analyzer pipeline, MEMORY_APP_NAME for the Memory Agent
+    """
+    from google.adk.runners import Runner
+    
+    pipeline = load_pipeline()
+    if app_name == MEMORY_APP_NAME:
+        return Runner(
+            app_name=MEMORY_APP_NAME,
+            agent=pipeline.memory_agent,
+            session_service=pipeline.session_service,
+        )
+    return Runner(app=pipeline.analyzer_app, session_service=pipeline.session_service)
+
+
+def close_session_db() -> None:
+    """
+    Close the session DB and delete it together with its WAL sidecar files.
+    
+    The engine is disposed first so no pooled connection keeps the files
+    open, and the -wal/-shm files go too so a stale WAL can't be replayed
+    into the next run's fresh database. The cached pipeline and runners are
+    dropped; the next analysis rebuilds them.
+    """
+    if load_pipeline.cache_info().currsize:
+        load_pipeline().session_service.db_engine.dispose()
+        get_runner.cache_clear()
+        load_pipeline.cache_clear()
+    for suffix in ("", "-wal", "-shm"):
+        db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+
+# PR files are analyzed concurrently; serialize writes to the shared PR session
+_pr_session_lock = asyncio.Lock()
 
 async def ensure_session(session_id: str, app_name: str = APP_NAME) -> bool:
     """
     Ensure a session exists, create if it doesn't.
     
+    One create_session call: it fails with AlreadyExistsError for an existing
+    session, so no get_session (which loads every event) is needed.
+    
     Returns:
         True if session already existed (has history), False if newly created
     """
-    session = await session_service.get_session(
-        app_name=app_name, 
-        user_id=USER_ID, 
-        session_id=session_id
-    )
-    if session is None:
-        await session_service.create_session(
+    from google.adk.errors.already_exists_error import AlreadyExistsError
+    
+    try:
+        await load_pipeline().session_service.create_session(
             app_name=app_name, 
             user_id=USER_ID, 
             session_id=session_id
         )
-        print(f"📝 Created new session: {session_id[:30]}...")
-        return False
-    else:
+    except AlreadyExistsError:
         print(f"♻️  Reusing session: {session_id[:30]}...")
         return True
+    
+    print(f"📝 Created new session: {session_id[:30]}...")
+    return False
+
+
+# Per-file summaries stored in the PR session for the Memory Agent
+_SUMMARY_PREFIX = "[ANALYSIS SUMMARY]"
+_NO_ISSUES = "No issues found"
 
+# Structured copy of each summary, kept in the event's custom_metadata
+_SUMMARY_METADATA_KEY = "analysis_summary"
 
-async def store_analysis_summary(pr_session_id: str, filename: str, result: str) -> None:
+# The memory context is computed from the stored summaries; set
+# USE_LLM_MEMORY=true to have the Memory Agent (an LLM call per file) write it
+USE_LLM_MEMORY = os.environ.get("USE_LLM_MEMORY", "false").lower() == "true"
+
+# Below this many prior files (or with no issues so far) the stored summaries
+# already are the memory context: skip the Memory Agent's LLM call
+MEMORY_AGENT_MIN_FILES = 2
+
+
+def summarize_history(entries: list[dict]) -> str:
+    """
+    Build the memory context from structured per-file summaries.
+    
+    Args:
+        entries: {"file": ..., "issue_counts": {title: count}} per analyzed file
+        
+    Returns:
+        Short summary: files analyzed and the most frequent issues
+    """
+    files = [e.get("file", "unknown") for e in entries]
+    counts = Counter()
+    for entry in entries:
+        counts.update(entry.get("issue_counts") or {})
+    
+    shown = ", ".join(files[:5]) + (f" and {len(files) - 5} more" if len(files) > 5 else "")
+    summary = f"{len(files)} files analyzed ({shown})."
+    if not counts:
+        return f"{summary} {_NO_ISSUES} so far."
+    top = ", ".join(f"{title} ({count}x)" for title, count in counts.most_common(5))
+    return f"{summary} Most frequent issues: {top}."
+
+
+async def store_analysis_summary(pr_session_id: str, filename: str, issues: list[dict]) -> None:
     """
     Store a SHORT summary of the analysis in the PR session for Memory Agent.
     
     This allows Memory Agent to see what was found without the full history.
+    
+    Args:
+        pr_session_id: PR-level session ID
+        filename: Analyzed file
+        issues: Issue dicts from the analysis report
     """
+    from google.adk.events import Event
+    from google.genai.types import Content, Part
+    
     try:
-        # Parse result to extract issue counts
-        import json
-        issues = []
-        try:
-            parsed = json.loads(result) if isinstance(result, str) else result
-            issues = parsed.get("issues", [])
-        except:
-            pass
-        
         # Create SHORT summary
         issue_types = {}
         for issue in issues:
@@ -111,30 +354,28 @@ async def store_analysis_summary(pr_session_id: str, filename: str, result: str)
         if issues:
             summary = f"File: {filename} - Found {len(issues)} issues: " + ", ".join(f"{k} ({v})" for k, v in issue_types.items())
         else:
-            summary = f"File: {filename} - No issues found"
-        
-        # Store in PR session
-        await ensure_session(pr_session_id, app_name=APP_NAME)
-        
-        # Create a simple runner just to store the summary
-        runner = Runner(
-            app_name=APP_NAME,
-            agent=active_analyzer,
-            session_service=session_service,
-        )
+            summary = f"File: {filename} - {_NO_ISSUES}"
         
         # Store as a user message (Memory Agent will see this)
-        summary_content = Content(
-            role="user", parts=[Part(text=f"[ANALYSIS SUMMARY] {summary}")]
+        summary_event = Event(
+            author="user",
+            content=Content(role="user", parts=[Part(text=f"{_SUMMARY_PREFIX} {summary}")]),
+            custom_metadata={
+                _SUMMARY_METADATA_KEY: {"file": filename, "issue_counts": issue_types}
+            }
         )
         
-        # Just add to session without running agent
-        async for _ in runner.run_async(
-            user_id=USER_ID,
-            session_id=pr_session_id,
-            new_message=summary_content,
-        ):
-            break  # We don't need the response, just storing the message
+        session_service = load_pipeline().session_service
+        async with _pr_session_lock:
+            # Store in PR session
+            await ensure_session(pr_session_id, app_name=APP_NAME)
+            
+            # Append straight to the session: going through the Runner would
+            # dispatch the agent (and possibly call the model) just to store it
+            session = await session_service.get_session(
+                app_name=APP_NAME, user_id=USER_ID, session_id=pr_session_id
+            )
+            await session_service.append_event(session, summary_event)
         
         print(f"💾 Stored summary in PR session")
     except Exception as e:
@@ -172,8 +413,10 @@ async def run_memory_agent(session_id: str) -> str:
     Returns:
         Clean summary string for the analyzer, or empty string if no history
     """
+    from google.genai.types import Content, Part
+    
     # Check if session has history
-    session = await session_service.get_session(
+    session = await load_pipeline().session_service.get_session(
         app_name=APP_NAME,
         user_id=USER_ID,
         session_id=session_id
@@ -182,17 +425,36 @@ async def run_memory_agent(session_id: str) -> str:
     if session is None:
         return ""
     
-    # Get session events to check if there's history
-    # Note: We don't need to read all events - Memory Agent will see them via session
+    summaries = []
+    entries = []
+    for event in session.events:
+        if event.content and event.content.parts:
+            text = event.content.parts[0].text or ""
+            if text.startswith(_SUMMARY_PREFIX):
+                summaries.append(text[len(_SUMMARY_PREFIX):].strip())
+                if event.custom_metadata and _SUMMARY_METADATA_KEY in event.custom_metadata:
+                    entries.append(event.custom_metadata[_SUMMARY_METADATA_KEY])
+    if not summaries:
+        return ""
+    
+    # Files and issue counts are all on record: no LLM needed to summarize them
+    # (always so with little history, or nothing found yet)
+    if (
+        not USE_LLM_MEMORY
+        or len(summaries) < MEMORY_AGENT_MIN_FILES
+        or all(s.endswith(_NO_ISSUES) for s in summaries)
+    ):
+        if len(entries) == len(summaries):
+            summary = summarize_history(entries)
+        else:
+            # Summaries stored before the structured copy existed
+            summary = "Previous files: " + "; ".join(summaries)
+        print(f"🧠 Memory extracted locally: {summary[:80]}...")
+        return summary
     
     print(f"🧠 Running Memory Agent to extract patterns...")
     
-    # Create runner for memory agent
-    memory_runner = Runner(
-        app_name=MEMORY_APP_NAME,
-        agent=memory_agent,
-        session_service=session_service,
-    )
+    memory_runner = get_runner(MEMORY_APP_NAME)
     
     # Memory agent prompt - ask for SHORT summary
     memory_prompt = """
@@ -208,199 +470,272 @@ If no prior analyses, say "First file - no prior context."
         role="user", parts=[Part(text=memory_prompt)]
     )
     
-    events = []
     try:
-        async for event in memory_runner.run_async(
+        # Return on the first final text; aclosing stops the run right away
+        async with aclosing(memory_runner.run_async(
             user_id=USER_ID,
             session_id=session_id,
             new_message=user_content,
-        ):
-            events.append(event)
-        
-        # Extract response
-        for event in events:
-            if event.is_final_response() and event.content and event.content.parts:
-                for part in event.content.parts:
-                    if hasattr(part, 'text') and part.text:
-                        summary = part.text.strip()
-                        print(f"✅ Memory extracted: {summary[:80]}...")
-                        return summary
+        )) as events:
+            async for event in events:
+                if event.is_final_response() and event.content and event.content.parts:
+                    for part in event.content.parts:
+                        text = getattr(part, 'text', None)
+                        if text:
+                            summary = text.strip()
+                            print(f"✅ Memory extracted: {summary[:80]}...")
+                            return summary
         
         return ""
     except Exception as e:
         print(f"⚠️  Memory Agent error: {e}")
         return ""
 
-def final_response_from_events(events: list[Event]):
-    """Extract final response from event stream."""
-    import json
+def bound_memory_context(memory_context: str) -> str:
+    """
+    Deterministically truncate memory context longer than _MEMORY_CTX_MAX.
     
-    final_response = ""
-    final_found = False
-    tool_results = []  # Collect tool results as fallback
+    Args:
+        memory_context: Cross-file context from the Memory Agent or caller
+        
+    Returns:
+        The context unchanged, or its head and tail around a truncation marker
+    """
+    if len(memory_context) <= _MEMORY_CTX_MAX:
+        return memory_context
+    dropped = len(memory_context) - _MEMORY_CTX_HEAD - _MEMORY_CTX_TAIL
+    return (
+        f"{memory_context[:_MEMORY_CTX_HEAD]}"
+        f"\n... [truncated {dropped} chars of middle] ...\n"
+        f"{memory_context[-_MEMORY_CTX_TAIL:]}"
+    )
+
+# Status of the fallback result when the pipeline produced nothing usable
+INCOMPLETE_STATUS = "Analysis incomplete - no tool results"
+
+# Tool result keys that can carry issues, and the trigger severities reported
+_ISSUE_KEYS = frozenset(('issues', 'hooks', 'triggers'))
+_TRIGGER_SEVERITIES = frozenset(('critical', 'high', 'warning'))
+
+
+def _cacheable(report_data: str) -> bool:
+    """
+    Only cache reports the model produced that parsed and validated.
+
+    Fallbacks synthesized from tool results and partially unreadable reports
+    are served once but not stored, so the next run asks the model again.
+    """
+    from agents import report_is_valid, report_summary
+    if not report_is_valid(report_data):
+        return False
+    summary = report_summary(report_data)
+    return not summary.get("synthesized") and summary.get("status") != INCOMPLETE_STATUS
+
+
+def issues_from_tool_result(name: str, data) -> list[dict]:
+    """
+    Convert one analysis tool response into standard issue dicts.
     
-    # Debug: Show event types
-    DEBUG = os.environ.get("DEBUG_EVENTS", "").lower() == "true"
-    if DEBUG:
-        print(f"\n🔍 DEBUG: Processing {len(events)} events:")
+    Used to synthesize a report when the agent ends without a final text
+    response. Tools report issues in different shapes (direct issue lists,
+    per-hook issues, render triggers).
     
-    for i, event in enumerate(events):
-        if DEBUG:
-            print(f"  Event {i}: is_final={event.is_final_response()}, author={getattr(event, 'author', 'unknown')}")
+    Args:
+        name: Tool name
+        data: Tool response payload
         
-        if event.content and event.content.parts:
-            for part in event.content.parts:
-                # Collect text responses
-                if hasattr(part, 'text') and part.text:
-                    if event.is_final_response():
-                        final_response = part.text
-                        final_found = True
-                        if DEBUG:
-                            print(f"    Found final text: {part.text[:80]}...")
-                
-                # Collect function responses (for fallback)
-                if hasattr(part, 'function_response'):
-                    resp = part.function_response
-                    if hasattr(resp, 'response') and resp.response:
-                        tool_results.append({
-                            'name': getattr(resp, 'name', 'unknown'),
-                            'data': resp.response
-                        })
-                        if DEBUG:
-                            print(f"    Tool response: {getattr(resp, 'name', 'unknown')}")
-    
-    # If no final text response, synthesize from tool results
-    if not final_found or not final_response.strip():
-        if tool_results:
-            print(f"📊 Synthesizing response from {len(tool_results)} tool results:")
-            for tr in tool_results:
-                print(f"   - {tr['name']}: {type(tr['data']).__name__}")
-            
-            # Collect all issues from all analysis tools
-            all_issues = []
-            parse_info = None
-            
-            for result in tool_results:
-                name = result['name']
-                data = result['data']
-                
-                # Collect parse info for context
-                if name == 'parse_code':
-                    parse_info = data
-                
-                # Collect issues from analysis tools (different structures)
-                if isinstance(data, dict):
-                    # Direct issues array (analyze_jsx_expressions, etc.)
-                    if 'issues' in data:
-                        all_issues.extend(data.get('issues', []))
-                    
-                    # Nested issues under hooks (analyze_hook_dependencies)
-                    if 'hooks' in data:
-                        for hook in data.get('hooks', []):
-                            if hook.get('has_issues') and 'issues' in hook:
-                                # Convert hook issues to standard format
-                                component = data.get('component', 'Unknown')
-                                for issue in hook.get('issues', []):
-                                    all_issues.append({
-                                        "file": "unknown",  # Will be set by caller
-                                        "line": hook.get('line', 0),
-                                        "component": component,
-                                        "severity": "high" if issue.get('severity') == 'warning' else "medium",
-                                        "title": f"{issue.get('type', 'unknown').replace('_', ' ').title()}",
-                                        "problem": issue.get('message', ''),
-                                        "suggestion": f"Review {issue.get('dependency', issue.get('variable', 'this dependency'))} in the hook"
-                                    })
-                    
-                    # Render triggers (analyze_render_triggers)
-                    if 'triggers' in data:
-                        for trigger in data.get('triggers', []):
-                            if trigger.get('severity') in ['critical', 'high', 'warning']:
-                                all_issues.append({
-                                    "file": "unknown",
-                                    "line": trigger.get('line', 0),
-                                    "component": data.get('component', 'Unknown'),
-                                    "severity": trigger.get('severity', 'medium'),
-                                    "title": trigger.get('type', 'Render Trigger'),
-                                    "problem": trigger.get('reason', ''),
-                                    "suggestion": "Consider memoizing or stabilizing this value"
-                                })
-            
-            print(f"   → Extracted {len(all_issues)} total issues from tools")
-            
-            if all_issues:
-                response = {
-                    "issues": all_issues,
-                    "summary": {
-                        "total_issues": len(all_issues),
-                        "components_analyzed": parse_info.get('components_found', []) if parse_info else []
-                    }
-                }
-                final_response = json.dumps(response, indent=2)
-                print(f"✅ Synthesized JSON with {len(all_issues)} issues")
-            else:
-                # No issues found - return clean empty result
-                components = parse_info.get('components_found', []) if parse_info else []
-                response = {
-                    "issues": [],
-                    "summary": {
-                        "total_issues": 0,
-                        "components_analyzed": components,
-                        "status": "No performance issues detected"
-                    }
-                }
-                final_response = json.dumps(response, indent=2)
-                print(f"✅ No issues found in {len(components)} components")
-        else:
-            print(f"⚠️  Warning: No response or tool results found")
-            final_response = json.dumps({
-                "issues": [], 
-                "summary": {"total_issues": 0, "status": "Analysis incomplete - no tool results"}
-            })
-    else:
-        preview = final_response[:100].replace('\n', ' ')
-        print(f"✅ Got response ({len(final_response)} chars): {preview}...")
+    Returns:
+        Issues in the report format (possibly empty)
+    """
+    issues = []
+    # Most tool results (parse_code, list_components, ...) carry no issues
+    if not isinstance(data, dict) or not (data.keys() & _ISSUE_KEYS):
+        return issues
+    append = issues.append
     
-    return final_response
+    # Direct issues array (analyze_jsx_expressions, etc.)
+    if 'issues' in data:
+        issues.extend(data.get('issues', []))
+    
+    # Nested issues under hooks (analyze_hook_dependencies)
+    if 'hooks' in data:
+        component = data.get('component', 'Unknown')
+        for hook in data.get('hooks', []):
+            if hook.get('has_issues') and 'issues' in hook:
+                # Convert hook issues to standard format
+                for issue in hook.get('issues', []):
+                    append({
+                        "file": "unknown",  # Will be set by caller
+                        "line": hook.get('line', 0),
+                        "component": component,
+                        "severity": "high" if issue.get('severity') == 'warning' else "medium",
+                        "title": f"{issue.get('type', 'unknown').replace('_', ' ').title()}",
+                        "problem": issue.get('message', ''),
+                        "suggestion": f"Review {issue.get('dependency', issue.get('variable', 'this dependency'))} in the hook"
+                    })
+    
+    # Render triggers (analyze_render_triggers)
+    if 'triggers' in data:
+        for trigger in data.get('triggers', []):
+            if trigger.get('severity') in _TRIGGER_SEVERITIES:
+                append({
+                    "file": "unknown",
+                    "line": trigger.get('line', 0),
+                    "component": data.get('component', 'Unknown'),
+                    "severity": trigger.get('severity', 'medium'),
+                    "title": trigger.get('type', 'Render Trigger'),
+                    "problem": trigger.get('reason', ''),
+                    "suggestion": "Consider memoizing or stabilizing this value"
+                })
+    
+    return issues
 
-async def run_agent_async(message: str, session_id: str):
+
+def synthesize_response(tool_count: int, issues: list[dict], components: list) -> str:
+    """
+    Build the issues JSON from tool results when the agent gave no final text.
+    
+    Args:
+        tool_count: Number of tool responses seen
+        issues: Issues extracted with issues_from_tool_result
+        components: Components reported by parse_code
+        
+    Returns:
+        Issues JSON string
+    """
+    if not tool_count:
+        print(f"⚠️  Warning: No response or tool results found")
+        return dumps_json({
+            "issues": [], 
+            "summary": {"total_issues": 0, "status": INCOMPLETE_STATUS, "synthesized": True}
+        })
+    
+    print(f"📊 Synthesizing response from {tool_count} tool results")
+    print(f"   → Extracted {len(issues)} total issues from tools")
+    
+    if issues:
+        response = {
+            "issues": issues,
+            "summary": {
+                "total_issues": len(issues),
+                "components_analyzed": components,
+                "synthesized": True
+            }
+        }
+        print(f"✅ Synthesized JSON with {len(issues)} issues")
+    else:
+        # No issues found - return clean empty result
+        response = {
+            "issues": [],
+            "summary": {
+                "total_issues": 0,
+                "components_analyzed": components,
+                "status": "No performance issues detected",
+                "synthesized": True
+            }
+        }
+        print(f"✅ No issues found in {len(components)} components")
+    return dumps_json(response, indent=True)
+
+async def run_agent_async(message: str, session_id: str, stream: bool = False):
     """
     Run the agent pipeline with a specific session ID.
     
     Args:
         message: The prompt/message for the agent
         session_id: Session ID (should be PR-level, e.g., 'pr-owner-repo-123')
+        stream: If True, request SSE streaming and echo model text to stdout
+                as it is generated instead of waiting for the full report
     
     Returns:
         Final response text from the agent
     """
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+    from google.genai.types import Content, Part
+    
     # Ensure session exists
     await ensure_session(session_id)
     
     # Reduced logging - don't print the full prompt with code
     print(f"🔄 Running analysis pipeline (session: {session_id[:20]}...)...")
     
-    # Create runner with our agent pipeline (single or multi-agent based on config)
-    runner = Runner(
-        app_name=APP_NAME,
-        agent=active_analyzer,
-        session_service=session_service,
-    )
+    # Shared runner for our agent pipeline (single or multi-agent based on config)
+    runner = get_runner(APP_NAME)
     
-    events = []
     user_content = Content(
         role="user", parts=[Part(text=message)]
     )
     
-    async for event in runner.run_async(
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE) if stream else None
+    
+    final_response = ""
+    tool_count = 0
+    tool_issues = []
+    components = []
+    final_author = load_pipeline().final_author
+    
+    # aclosing: stopping early must close the run generator right away
+    async with aclosing(runner.run_async(
         user_id=USER_ID,
         session_id=session_id,
         new_message=user_content,
-    ):
-        events.append(event)
+        run_config=run_config,
+    )) as events:
+        async for event in events:
+            if event.partial:
+                # Partial chunks are only for display; the aggregated event follows
+                if event.content and event.content.parts:
+                    for part in event.content.parts:
+                        if part.text:
+                            print(part.text, end="", flush=True)
+                continue
+            
+            # Process each event as it arrives and keep only what the report
+            # needs (final text, issue dicts) - not every event's tool payload
+            is_final = event.is_final_response()
+            if DEBUG_EVENTS:
+                print(f"  Event: is_final={is_final}, author={event.author}")
+            if not (event.content and event.content.parts):
+                continue
+            
+            # A Part holds exactly one kind of payload, so at most one branch
+            # applies: text parts never reach the tool-response checks
+            for part in event.content.parts:
+                if part.text:
+                    if is_final:
+                        final_response = part.text
+                        if DEBUG_EVENTS:
+                            print(f"    Found final text: {part.text[:80]}...")
+                    continue
+            
+                # Tool responses are the fallback if no final text arrives
+                resp = part.function_response
+                if resp and resp.response:
+                    tool_count += 1
+                    if DEBUG_EVENTS:
+                        print(f"    Tool response: {resp.name}")
+                    if resp.name == 'parse_code':
+                        components = resp.response.get('components_found', [])
+                    tool_issues.extend(issues_from_tool_result(resp.name, resp.response))
+            
+            # The answer is in: don't wait for any trailing events
+            if is_final and event.author == final_author and final_response.strip():
+                break
+            
+    if not final_response.strip():
+        return synthesize_response(tool_count, tool_issues, components)
     
-    return final_response_from_events(events)
+    preview = final_response[:100].replace('\n', ' ')
+    print(f"✅ Got response ({len(final_response)} chars): {preview}...")
+    return final_response
 
-async def analyze_file(file_path: str, output_format: str = "markdown", session_id: str = None) -> str:
+async def analyze_file(
+    file_path: str,
+    output_format: str = "markdown",
+    session_id: str = None,
+    stream: bool = False,
+    memory_context: str = ""
+) -> str:
     """
     Analyze a React file for performance issues using multi-agent system.
     
@@ -408,14 +743,20 @@ async def analyze_file(file_path: str, output_format: str = "markdown", session_
         file_path: Path to the React/TypeScript file
         output_format: Output format (markdown, json, github)
         session_id: Optional session ID. If not provided, generates one based on filename.
+        stream: Echo the report to stdout while it is being generated
+        memory_context: Optional cross-file context to include in the prompt
     
     Returns:
         Formatted analysis report from the agent pipeline
     """
-    code = Path(file_path).read_text()
+    # Read off the event loop so concurrent analyses keep running meanwhile
+    code = await asyncio.to_thread(Path(file_path).read_text, encoding="utf-8")
     
     # For standalone file analysis, no PR session needed
-    return await analyze_code(code, output_format, file_path, pr_session_id=None)
+    return await analyze_code(
+        code, output_format, file_path,
+        memory_context=memory_context, pr_session_id=None, stream=stream
+    )
 
 
 async def analyze_code(
@@ -424,7 +765,8 @@ async def analyze_code(
     filename: str = "component.tsx", 
     pr_session_id: str = None,
     memory_context: str = "",
-    is_first_file: bool = True
+    is_first_file: bool = True,
+    stream: bool = False
 ) -> str:
     """
     Analyze React code string for performance issues using multi-agent system.
@@ -436,99 +778,234 @@ async def analyze_code(
         pr_session_id: PR-level session ID (for Memory Agent to read history)
         memory_context: Additional context from Memory Agent
         is_first_file: If True, skip memory extraction (no history yet)
+        stream: Echo the report to stdout while it is being generated
     
     Returns:
         Formatted analysis report from the agent pipeline
     """
     # Generate FRESH session for analyzer (no history accumulation)
     file_stem = Path(filename).stem
-    analyzer_session_id = f"analyze-{file_stem}-{uuid.uuid4().hex[:8]}"
+    analyzer_session_id = f"analyze-{file_stem}-{_RUN_ID}-{next(_SESSION_COUNTER):x}"
     
     # For PR analysis, get memory context from shared session
     if pr_session_id and not is_first_file and not memory_context:
         memory_context = await run_memory_agent(pr_session_id)
+    memory_context = bound_memory_context(memory_context)
+    
+    # Unchanged file + same context: reuse the stored report (in any format)
+    cache_key = result_key(code, filename, memory_context)
+    report_data = get_cached_result(cache_key)
+    if report_data is not None:
+        print(f"🟢 Result cache hit for {filename}")
+        return await _finish_report(report_data, output_format, filename, pr_session_id)
     
     # Build memory context section if available
-    memory_prompt = ""
-    if memory_context:
-        memory_prompt = f"""
-
-## 🧠 PROJECT MEMORY (Cross-File Context)
-
-You have access to information from previous files analyzed in this PR:
-{memory_context}
-
-Use this context to:
-- Prioritize recurring issues higher (if you see the same pattern again)
-- Provide convention-aware suggestions (e.g., "This project uses Redux, so...")
-- Recognize project-wide patterns that need systemic fixes
-- Give context about how many times you've seen similar issues
-"""
+    memory_prompt = (
+        _MEMORY_PROMPT_TEMPLATE.format(memory_context=memory_context)
+        if memory_context else ""
+    )
     
-    prompt = f"""
-Analyze this React code for performance issues and output as {output_format} format.
-
-File: {filename}
-
-```tsx
-{code}
-```
-{memory_prompt}
-
-IMPORTANT: The final output MUST be valid {output_format.upper()} only - no explanations or additional text.
-
-Follow this pipeline:
-1. Parser Agent: Parse the code to extract AST data
-2. Analyzer Agent: Identify performance issues using the tools
-3. Reasoner Agent: Validate issues and create structured issue objects with:
-   - file: "{filename}"
-   - line: <line_number>
-   - component: <component_name>
-   - severity: "critical"|"high"|"medium"|"low"
-   - title: <brief_title>
-   - problem: <description>
-   - suggestion: <how_to_fix>
-4. Reporter Agent: MUST call format_report() tool with output_format="{output_format}"
-
-Focus on:
-- Critical: Inline functions/objects breaking memoization
-- High: Unstable hook dependencies
-- Medium: Unnecessary re-renders
-- Low: Minor optimizations
-
-The final response must be ONLY the formatted {output_format} - no explanations.
-"""
+    # Static instructions first (identical for every file, so they stay in the
+    # cached prefix), file-specific content last
+    prompt = _PROMPT_TEMPLATE.format(
+        prefix=ANALYSIS_PROMPT_PREFIX,
+        filename=filename,
+        code=code,
+        memory_prompt=memory_prompt
+    )
     
     # Run agent with unique session ID (fresh context per file)
     # Use FRESH session for analyzer (no history accumulation)
-    result = await run_agent_async(prompt, analyzer_session_id)
+    report_data = await run_agent_async(prompt, analyzer_session_id, stream=stream)
+    
+    # Don't cache failed or fallback runs, so they are retried next time
+    if _cacheable(report_data):
+        store_result(cache_key, report_data)
+    
+    return await _finish_report(report_data, output_format, filename, pr_session_id)
+
+
+async def _finish_report(
+    report_data: str,
+    output_format: str,
+    filename: str,
+    pr_session_id: str = None
+) -> str:
+    """Render a report locally and record its summary in the PR session."""
+    # Formatting is deterministic and needs no LLM call
+    from agents import format_report, report_issues
     
     # Store summary in PR session for Memory Agent to read later
     if pr_session_id:
-        await store_analysis_summary(pr_session_id, filename, result)
+        await store_analysis_summary(pr_session_id, filename, report_issues(report_data))
+    
+    return format_report(report_data, output_format)
+
+
+async def analyze_code_group(
+    files: dict[str, str],
+    output_format: str = "markdown",
+    memory_context: str = ""
+) -> dict[str, str]:
+    """
+    Analyze several small files with a single pipeline run.
+    
+    Args:
+        files: Dictionary mapping filenames to their code
+        output_format: Output format (markdown, json, github)
+        memory_context: Cross-file context to include in the prompt
     
-    return result
+    Returns:
+        Dictionary mapping each filename to its formatted report
+    """
+    memory_context = bound_memory_context(memory_context)
+    
+    # Cached files drop out of the group
+    results = {}
+    pending = {}
+    for filename, code in files.items():
+        cache_key = result_key(code, filename, memory_context)
+        report_data = get_cached_result(cache_key)
+        if report_data is not None:
+            print(f"🟢 Result cache hit for {filename}")
+            results[filename] = await _finish_report(report_data, output_format, filename)
+        else:
+            pending[filename] = cache_key
+    
+    if len(pending) == 1:
+        filename = next(iter(pending))
+        results[filename] = await analyze_code(
+            files[filename], output_format, filename, memory_context=memory_context
+        )
+        return results
+    if not pending:
+        return results
+    
+    prompt = _GROUP_PROMPT_TEMPLATE.format(
+        prefix=ANALYSIS_PROMPT_PREFIX,
+        file_blocks="".join(
+            _GROUP_FILE_TEMPLATE.format(filename=filename, code=files[filename])
+            for filename in pending
+        ),
+        memory_prompt=(
+            _MEMORY_PROMPT_TEMPLATE.format(memory_context=memory_context)
+            if memory_context else ""
+        )
+    )
+    
+    session_id = f"analyze-group-{_RUN_ID}-{next(_SESSION_COUNTER):x}"
+    result = await run_agent_async(prompt, session_id)
+    complete = _cacheable(result)
+    
+    from agents import split_report
+    reports, rerun = split_report(result, {filename: files[filename] for filename in pending})
+    for filename, report_data in reports.items():
+        if complete:
+            store_result(pending[filename], report_data)
+        results[filename] = await _finish_report(report_data, output_format, filename)
+    
+    # Files the group report couldn't be attributed to get their own run
+    # rather than losing those findings
+    for filename in (f for f in pending if f in rerun):
+        results[filename] = await analyze_code(
+            files[filename], output_format, filename, memory_context=memory_context
+        )
+    
+    return results
 
 
-async def analyze_multiple_files(file_paths: list[str], output_format: str = "markdown") -> dict:
+async def analyze_multiple_files(
+    file_paths: list[str],
+    output_format: str = "markdown",
+    mode: str = "interactive",
+    memory_context: str = ""
+) -> dict:
     """
     Analyze multiple React files and provide cross-file insights.
     
     Args:
         file_paths: List of file paths to analyze
         output_format: Output format (markdown, json, github)
+        mode: "interactive" runs the agent pipeline per file (small files
+              several to a run, see GROUP_MAX_CHARS); "batch" submits all
+              files as one Gemini Batch Mode job (cheaper, no per-minute
+              rate limits, minutes of latency - meant for CI)
+        memory_context: Cross-file context shared by every file (interactive
+              mode only)
     
     Returns:
-        Dictionary mapping file paths to their analysis results
+        Dictionary mapping file paths to their analysis results (an error
+        dict for files whose analysis raised)
     """
+    codes = await asyncio.gather(
+        *(asyncio.to_thread(Path(p).read_text, encoding="utf-8") for p in file_paths),
+        return_exceptions=True
+    )
+    
     results = {}
+    files = {}
+    for file_path, code in zip(file_paths, codes):
+        if isinstance(code, Exception):
+            _record_error(results, [file_path], code)
+        else:
+            files[file_path] = code
     
-    for file_path in file_paths:
-        print(f"Analyzing {file_path}...")
-        result = await analyze_file(file_path, output_format)
-        results[file_path] = result
+    if mode == "batch":
+        from batch import run_batch_analysis
+        results.update(await run_batch_analysis(files, output_format))
+        return {p: results[p] for p in file_paths}
     
-    return results
+    # Files are independent pipelines: run them concurrently, capped so we
+    # stay under the provider's rate limits
+    sem = asyncio.Semaphore(int(os.getenv("PERF_CONCURRENCY", "8")))
+    
+    # Snapshot the shared context once, before fan-out: every file sees the
+    # same value and no task reads memory another task is still writing
+    memory_context = bound_memory_context(memory_context)
+    
+    # Small files share a pipeline run, up to MAX_BATCH_FILES per prompt;
+    # everything else is analyzed on its own
+    small = [p for p in files if len(files[p]) <= GROUP_MAX_CHARS]
+    if len(small) < 2:
+        small = []
+    grouped = set(small)
+    groups = [[p] for p in files if p not in grouped]
+    if small:
+        from agents import MAX_BATCH_FILES
+        groups += [small[i:i + MAX_BATCH_FILES] for i in range(0, len(small), MAX_BATCH_FILES)]
+    
+    async def _one(group: list[str]) -> dict:
+        async with sem:
+            print(f"Analyzing {', '.join(group)}...")
+            if len(group) == 1:
+                return {group[0]: await analyze_code(
+                    files[group[0]], output_format, group[0], memory_context=memory_context
+                )}
+            return await analyze_code_group(
+                {p: files[p] for p in group}, output_format, memory_context
+            )
+    
+    outcomes = await asyncio.gather(
+        *(_one(group) for group in groups),
+        return_exceptions=True
+    )
+    
+    for group, outcome in zip(groups, outcomes):
+        if isinstance(outcome, Exception):
+            # One failed group shouldn't lose the rest of the batch
+            _record_error(results, group, outcome)
+        else:
+            results.update(outcome)
+    
+    # Report in the order the files were given
+    return {p: results[p] for p in file_paths}
+
+
+def _record_error(results: dict, file_paths: list[str], error: Exception) -> None:
+    """Store an error dict for each file whose analysis raised."""
+    print(f"❌ Error analyzing {', '.join(file_paths)}: {error}")
+    for file_path in file_paths:
+        results[file_path] = {"error": str(error), "error_type": type(error).__name__}
 
 
 # CLI interface
@@ -536,15 +1013,22 @@ async def main():
     """CLI entry point."""
     import sys
     
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <file_path> [output_format]")
+    flags = {a for a in sys.argv[1:] if a.startswith("--")}
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    batch_mode = "--batch" in flags
+    stream = "--stream" in flags and not batch_mode
+    
+    if len(args) < 1:
+        print("Usage: python main.py <file_path> [output_format] [--batch] [--stream]")
         print("  output_format: markdown (default), json, github")
+        print("  --batch: submit via Gemini Batch Mode (cheaper, slower; for CI)")
+        print("  --stream: show model output as it is generated")
         print("\nExample:")
         print("  python main.py ../examples/UserList.tsx markdown")
         sys.exit(1)
     
-    file_path = sys.argv[1]
-    output_format = sys.argv[2] if len(sys.argv) > 2 else "markdown"
+    file_path = args[0]
+    output_format = args[1] if len(args) > 1 else "markdown"
     
     if not Path(file_path).exists():
         print(f"Error: File not found: {file_path}")
@@ -555,7 +1039,13 @@ async def main():
     print("=" * 60)
     
     try:
-        result = await analyze_file(file_path, output_format)
+        if batch_mode:
+            results = await analyze_multiple_files([file_path], output_format, mode="batch")
+            result = results[file_path]
+        else:
+            result = await analyze_file(file_path, output_format, stream=stream)
+        if stream:
+            print()  # End the streamed model output before the rendered report
         print(result)
     except Exception as e:
         print(f"❌ Error during analysis: {e}")
@@ -565,4 +1055,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_fast_event_loop()
     asyncio.run(main())
@@ -2,6 +2,10 @@ from dataclasses import dataclass, field
 from typing import Optional
 from datetime import datetime
 
+from utils import intern_label
+
+_REDUX_HOOKS = frozenset(("useSelector", "useDispatch"))
+
 
 @dataclass
 class ProjectMemory:
@@ -26,28 +30,35 @@ class ProjectMemory:
             "timestamp": datetime.now().isoformat(),
         }
 
-        # Track recurring issues
+        # Track recurring issues (reasoned issues carry a title, raw tool issues a type)
         for issue in issues:
-            issue_type = issue.get("type", "unknown")
+            # Interned: every file repeats the same few labels
+            issue_type = intern_label(issue.get("type") or issue.get("title", "unknown"))
             self.recurring_issues[issue_type] = self.recurring_issues.get(issue_type, 0) + 1
 
     def detect_conventions(self, components: list[dict]):
         """Detect project conventions from analyzed components."""
-        # Check for consistent patterns
-        memo_usage = sum(1 for c in components if c.get("isMemoized"))
+        # One pass over components and their hooks; stop scanning hooks once
+        # redux is seen (it takes precedence over context)
+        memo_usage = 0
+        has_context = False
+        has_redux = False
+        for c in components:
+            if c.get("isMemoized"):
+                memo_usage += 1
+            if has_redux:
+                continue
+            for h in c.get("hooks", ()):
+                hook_type = h.get("type")
+                if hook_type in _REDUX_HOOKS:
+                    has_redux = True
+                    break
+                if hook_type == "useContext":
+                    has_context = True
+
         if memo_usage > len(components) * 0.7:
             self.conventions["memoization"] = "heavy"
 
-        # Check state management patterns
-        has_context = any(
-            any(h.get("type") == "useContext" for h in c.get("hooks", []))
-            for c in components
-        )
-        has_redux = any(
-            any(h.get("type") in ["useSelector", "useDispatch"] for h in c.get("hooks", []))
-            for c in components
-        )
-
         if has_redux:
             self.conventions["state_management"] = "redux"
         elif has_context:
@@ -77,3 +88,24 @@ class ProjectMemory:
             "component_graph": self.component_graph,
             "warning": self.get_recurring_issue_warning()
         }
+
+
+def summarize_cross_file_patterns(results: list[dict]) -> dict:
+    """
+    Build cross-file insights for a PR in one pass over every file's result.
+
+    Args:
+        results: Per-file analysis results (filename, success, issues)
+
+    Returns:
+        Dict with recurring_warning and detected_conventions
+    """
+    memory = ProjectMemory()
+    for result in results:
+        if result.get("success"):
+            memory.record_analysis(result["filename"], result.get("issues") or [])
+
+    return {
+        "recurring_warning": memory.get_recurring_issue_warning(),
+        "detected_conventions": memory.conventions,
+    }
@@ -1,8 +1,25 @@
+import atexit
+import hashlib
+import os
+import select
 import subprocess
 import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
+from uuid import uuid4
 from pydantic import BaseModel
+from utils import dumps_json, intern_label, loads_json
+
+PARSER_TIMEOUT_SECONDS = 30
+
+DEFAULT_PARSER_PATH = (Path(__file__).parent.parent / "parser" / "dist" / "cli.js").resolve()
+
+# Idle `node cli.js --serve` processes kept for reuse (0 = spawn node per
+# parse). Needs select() on pipes, so POSIX only.
+PARSER_WORKERS = int(os.getenv("PERF_PARSER_WORKERS", "4")) if os.name == "posix" else 0
 
 
 class ParseResult(BaseModel):
@@ -14,6 +31,88 @@ class ParseResult(BaseModel):
     metadata: dict
 
 
+class _ParserWorker:
+    """A long-lived parser process answering one JSON line per request line."""
+
+    def __init__(self, parser_path: Path):
+        self.parser_path = parser_path
+        self.proc = subprocess.Popen(
+            ["node", str(parser_path), "--serve"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+    def request(self, code: str) -> bytes:
+        """Send one file, return the raw JSON result line."""
+        self.proc.stdin.write(dumps_json({"code": code}).encode() + b"\n")
+        self.proc.stdin.flush()
+        ready, _, _ = select.select([self.proc.stdout], [], [], PARSER_TIMEOUT_SECONDS)
+        if not ready:
+            raise subprocess.TimeoutExpired(self.proc.args, PARSER_TIMEOUT_SECONDS)
+        line = self.proc.stdout.readline()
+        if not line:
+            raise RuntimeError("Parser worker exited")
+        return line
+
+    def close(self):
+        self.proc.kill()
+        self.proc.wait()
+
+
+_idle_workers: list[_ParserWorker] = []
+_workers_lock = threading.Lock()
+# Set when a fresh worker can't serve (e.g. a dist/ built before --serve existed)
+_workers_unavailable = False
+
+
+@atexit.register
+def _close_workers():
+    with _workers_lock:
+        workers = _idle_workers[:]
+        _idle_workers.clear()
+    for worker in workers:
+        worker.close()
+
+
+def _parse_in_worker(code: str, parser_path: Path) -> Optional[bytes]:
+    """
+    Parse with a pooled parser process.
+
+    Returns:
+        Raw JSON output, or None if workers can't be used (caller falls back
+        to a one-shot process)
+    """
+    global _workers_unavailable
+    with _workers_lock:
+        worker = next((w for w in _idle_workers if w.parser_path == parser_path), None)
+        if worker is not None:
+            _idle_workers.remove(worker)
+    fresh = worker is None
+
+    try:
+        if fresh:
+            worker = _ParserWorker(parser_path)
+        output = worker.request(code)
+    except subprocess.TimeoutExpired:
+        worker.close()
+        raise
+    except Exception:
+        if worker is not None:
+            worker.close()
+        if fresh:
+            _workers_unavailable = True
+        return None
+
+    with _workers_lock:
+        if len(_idle_workers) < PARSER_WORKERS:
+            _idle_workers.append(worker)
+            worker = None
+    if worker is not None:
+        worker.close()
+    return output
+
+
 def parse_react_code(
     code: str,
     filename: str = "component.tsx",
@@ -31,30 +130,48 @@ def parse_react_code(
         ParseResult with component information
     """
     if parser_path is None:
-        parser_path = Path(__file__).parent.parent / "parser" / "dist" / "cli.js"
+        parser_path = DEFAULT_PARSER_PATH
 
-    try:
-        result = subprocess.run(
-            ["node", str(parser_path)],
-            input=code,
-            capture_output=True,
-            text=True,
-            timeout=30
+    if not parser_path.exists():
+        # Fail with the fix instead of a Node "Cannot find module" trace
+        return ParseResult(
+            success=False,
+            components=[],
+            imports=[],
+            exports=[],
+            errors=[{"message": f"Parser not built: {parser_path} is missing (run `npm run build` in parser/)"}],
+            metadata={}
         )
 
-        if result.returncode != 0:
-            error_msg = result.stderr or "Parser exited with non-zero code"
-            return ParseResult(
-                success=False,
-                components=[],
-                imports=[],
-                exports=[],
-                errors=[{"message": error_msg}],
-                metadata={}
+    try:
+        # A pooled parser process skips Node start-up (~100-300 ms per file)
+        stdout = None
+        if PARSER_WORKERS and not _workers_unavailable:
+            stdout = _parse_in_worker(code, parser_path)
+
+        if stdout is None:
+            result = subprocess.run(
+                ["node", str(parser_path)],
+                # Raw bytes: orjson decodes stdout directly without a str copy
+                input=code.encode(),
+                capture_output=True,
+                timeout=PARSER_TIMEOUT_SECONDS
             )
 
+            if result.returncode != 0:
+                error_msg = result.stderr.decode(errors="replace") or "Parser exited with non-zero code"
+                return ParseResult(
+                    success=False,
+                    components=[],
+                    imports=[],
+                    exports=[],
+                    errors=[{"message": error_msg}],
+                    metadata={}
+                )
+            stdout = result.stdout
+
         # Check if stdout is empty
-        if not result.stdout or result.stdout.strip() == "":
+        if not stdout or stdout.strip() == b"":
             return ParseResult(
                 success=False,
                 components=[],
@@ -66,7 +183,7 @@ def parse_react_code(
 
         # Try to parse JSON
         try:
-            data = json.loads(result.stdout)
+            data = loads_json(stdout)
         except json.JSONDecodeError as e:
             return ParseResult(
                 success=False,
@@ -75,7 +192,7 @@ def parse_react_code(
                 exports=[],
                 errors=[{
                     "message": f"Invalid JSON from parser: {str(e)}",
-                    "output_preview": result.stdout[:200]
+                    "output_preview": stdout[:200].decode(errors="replace")
                 }],
                 metadata={}
             )
@@ -102,32 +219,319 @@ def parse_react_code(
         )
 
 
-# Singleton to hold parsed AST data for tool access
+# Parser records materialized once per parse. Tools walk these on every
+# call, and a slot lookup is cheaper than a dict .get(); the parser JSON
+# schema lives in parser/src/types.ts. Repeated labels (hook/expression
+# types, component names) are interned here, once, rather than per tool call.
+@dataclass(slots=True, frozen=True)
+class Dependency:
+    name: Optional[str]
+    is_stable: Optional[bool]
+    stability_reason: Optional[str]
+
+
+@dataclass(slots=True, frozen=True)
+class Hook:
+    type: Optional[str]
+    line: Optional[int]
+    # None = no dependency array provided
+    dependencies: Optional[tuple[Dependency, ...]]
+    body_references: tuple[str, ...]
+    return_value: Optional[str]
+    # Parser dict, reported back verbatim by the tools
+    raw: dict = field(compare=False, repr=False)
+
+
+@dataclass(slots=True, frozen=True)
+class Prop:
+    name: Optional[str]
+    used_in_render: Optional[bool]
+    used_in_hooks: tuple[str, ...]
+    passed_to_children: tuple[dict, ...]
+
+
+@dataclass(slots=True, frozen=True)
+class StateVar:
+    name: Optional[str]
+    setter: Optional[str]
+    type: Optional[str]
+    usage_count: int
+
+
+@dataclass(slots=True, frozen=True)
+class JsxExpression:
+    type: Optional[str]
+    line: Optional[int]
+    prop_name: Optional[str]
+    passed_to_component: Optional[str]
+    is_component_memoized: Optional[bool]
+    source_text: str
+    captured_variables: tuple[dict, ...]
+
+
+# Hooks that take a dependency array
+DEP_HOOKS = frozenset(("useEffect", "useLayoutEffect", "useMemo", "useCallback"))
+
+
+@dataclass(slots=True, frozen=True)
+class Component:
+    name: Optional[str]
+    is_memoized: Optional[bool]
+    props: tuple[Prop, ...]
+    state: tuple[StateVar, ...]
+    hooks: tuple[Hook, ...]
+    # (index in hooks, hook) for the DEP_HOOKS entries only
+    dep_hooks: tuple[tuple[int, Hook], ...]
+    children: tuple[str, ...]
+    jsx_expressions: tuple[JsxExpression, ...]
+    # Parser dict, returned as-is by inspect_component
+    raw: dict = field(compare=False, repr=False)
+
+
+def _hook_from_dict(hook: dict) -> Hook:
+    deps = hook.get("dependencies")
+    return Hook(
+        type=intern_label(hook.get("type")),
+        line=hook.get("line"),
+        dependencies=None if deps is None else tuple(
+            Dependency(d.get("name"), d.get("isStable"), intern_label(d.get("stabilityReason")))
+            for d in deps
+        ),
+        body_references=tuple(hook.get("bodyReferences", ())),
+        return_value=hook.get("returnValue"),
+        raw=hook,
+    )
+
+
+def component_from_dict(comp: dict) -> Component:
+    """Convert one parser ComponentInfo dict into a Component."""
+    hooks = tuple(_hook_from_dict(h) for h in comp.get("hooks", ()))
+    return Component(
+        name=intern_label(comp.get("name")),
+        is_memoized=comp.get("isMemoized"),
+        props=tuple(
+            Prop(
+                name=p.get("name"),
+                used_in_render=p.get("usedInRender"),
+                used_in_hooks=tuple(p.get("usedInHooks") or ()),
+                passed_to_children=tuple(p.get("passedToChildren") or ()),
+            )
+            for p in comp.get("props", ())
+        ),
+        state=tuple(
+            StateVar(
+                name=s.get("name"),
+                setter=s.get("setter"),
+                type=intern_label(s.get("type")),
+                usage_count=len(s.get("usageLocations", ())),
+            )
+            for s in comp.get("state", ())
+        ),
+        hooks=hooks,
+        dep_hooks=tuple((i, h) for i, h in enumerate(hooks) if h.type in DEP_HOOKS),
+        children=tuple(comp.get("children", ())),
+        jsx_expressions=tuple(
+            JsxExpression(
+                type=intern_label(e.get("type")),
+                line=e.get("line"),
+                prop_name=e.get("propName"),
+                passed_to_component=intern_label(e.get("passedToComponent")),
+                is_component_memoized=e.get("isComponentMemoized"),
+                source_text=e.get("sourceText", ""),
+                captured_variables=tuple(e.get("capturedVariables", ())),
+            )
+            for e in comp.get("jsxExpressions", ())
+        ),
+        raw=comp,
+    )
+
+
+@dataclass(frozen=True)
+class PropEdge:
+    """One prop pass from a component to a child (possibly renamed)."""
+    child: str
+    as_name: Optional[str]
+    transformed: Optional[bool]
+    child_memoized: Optional[bool]
+
+
+# Parsed AST data for tool access: one file, or one parse_codes batch
 class AstContext:
-    _instance = None
-    _data: Optional[ParseResult] = None
+    def __init__(self):
+        self._data: Optional[ParseResult] = None
+        # filename -> ParseResult for multi-file batches
+        self._files: dict[str, ParseResult] = {}
+        # (filename, source hash) per set_data call; None once any source is unhashed
+        self._sources: Optional[list[tuple[str, str]]] = []
+        # Components converted once per set_data (last parse, and per file)
+        self._components: tuple[Component, ...] = ()
+        self._file_components: dict[str, tuple[Component, ...]] = {}
+        # Component name -> component, built once per set_data so tool
+        # lookups don't rescan the component lists
+        self._by_name: dict[str, Component] = {}
+        self._names: list = []
+        self._file_index: dict[str, dict[str, Component]] = {}
+        # Every name get_component() can resolve without a file
+        self.component_names: frozenset[str] = frozenset()
+        # id(component) -> prop name -> prop, built on first lookup
+        self._prop_index: dict[int, dict[str, Prop]] = {}
+        # (component, prop) -> passes to children, built on first trace
+        self._prop_edges: Optional[dict[tuple[str, str], list[PropEdge]]] = None
+        # Bumped by every set_data/clear; tool results memoized in
+        # tool_memo are keyed by it, so they never outlive their parse. The
+        # memo holds JSON text so every hit decodes a fresh, mutable copy
+        self.parse_version = 0
+        self.tool_memo: dict[tuple, str] = {}
 
-    @classmethod
-    def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
+    @staticmethod
+    def _index(components: tuple[Component, ...]) -> dict[str, Component]:
+        index = {}
+        for comp in components:
+            # setdefault: the first component with a name wins, as in a scan
+            index.setdefault(comp.name, comp)
+        return index
 
-    def set_data(self, data: ParseResult):
+    def set_data(self, data: ParseResult, filename: Optional[str] = None, source_hash: Optional[str] = None):
         self._data = data
+        self._components = tuple(component_from_dict(c) for c in data.components)
+        self._by_name = self._index(self._components)
+        self._names = [c.name for c in self._components]
+        if filename:
+            self._files[filename] = data
+            self._file_components[filename] = self._components
+            self._file_index[filename] = self._by_name
+        self.component_names = frozenset(self._by_name).union(*self._file_index.values())
+        # Keyed by id(): a re-parse frees the old components and their ids
+        # can be reused by new ones, so the index must not outlive the parse
+        self._prop_index = {}
+        self._prop_edges = None
+        self._new_version()
+        if source_hash is None or self._sources is None:
+            self._sources = None
+        else:
+            self._sources.append((filename or "", source_hash))
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """Content hash of every source in this context (None if unknown)."""
+        if not self._sources:
+            return None
+        return hashlib.blake2b(repr(self._sources).encode(), digest_size=16).hexdigest()
 
-    def get_data(self) -> Optional[ParseResult]:
+    def get_data(self, file: Optional[str] = None) -> Optional[ParseResult]:
+        if file is not None:
+            return self._files.get(file)
         return self._data
 
-    def get_component(self, name: str) -> Optional[dict]:
-        if not self._data:
-            return None
-        for comp in self._data.components:
-            if comp.get("name") == name:
+    def get_components(self, file: Optional[str] = None) -> Optional[tuple[Component, ...]]:
+        if file is not None:
+            return self._file_components.get(file)
+        return self._components if self._data is not None else None
+
+    def clear(self):
+        self._data = None
+        self._files = {}
+        self._sources = []
+        self._components = ()
+        self._file_components = {}
+        self._by_name = {}
+        self._names = []
+        self._file_index = {}
+        self.component_names = frozenset()
+        self._prop_index = {}
+        self._prop_edges = None
+        self._new_version()
+
+    def _new_version(self):
+        self.parse_version += 1
+        self.tool_memo = {}
+
+    def get_files(self) -> list[str]:
+        return list(self._files.keys())
+
+    def exists(self, name: str, file: Optional[str] = None) -> bool:
+        """Cheap check that get_component(name, file) would find something."""
+        if file is not None:
+            return name in self._file_index.get(file, ())
+        return name in self.component_names
+
+    def get_component(self, name: str, file: Optional[str] = None) -> Optional[Component]:
+        if file is not None:
+            return self._file_index.get(file, {}).get(name)
+        # Last parsed file first, then every other file of the batch
+        comp = self._by_name.get(name)
+        if comp is not None:
+            return comp
+        for index in self._file_index.values():
+            comp = index.get(name)
+            if comp is not None:
                 return comp
         return None
 
+    def get_prop(self, component: Component, name: str) -> Optional[Prop]:
+        index = self._prop_index.get(id(component))
+        if index is None:
+            index = {}
+            for prop in component.props:
+                index.setdefault(prop.name, prop)
+            self._prop_index[id(component)] = index
+        return index.get(name)
+
+    @property
+    def prop_edges(self) -> dict[tuple[str, str], list[PropEdge]]:
+        """Prop-flow graph over every component, built once per parse."""
+        if self._prop_edges is None:
+            names = set(self._by_name)
+            for index in self._file_index.values():
+                names.update(index)
+
+            edges = {}
+            for name in names:
+                component = self.get_component(name)
+                for prop in component.props:
+                    passes = prop.passed_to_children
+                    if not passes:
+                        continue
+                    out = edges.setdefault((name, prop.name), [])
+                    for child_pass in passes:
+                        child_name = child_pass.get("childComponent")
+                        child = self.get_component(child_name)
+                        out.append(PropEdge(
+                            child=child_name,
+                            as_name=child_pass.get("asPropName"),
+                            transformed=child_pass.get("transformed"),
+                            child_memoized=child.is_memoized if child else False,
+                        ))
+            self._prop_edges = edges
+        return self._prop_edges
+
     def get_all_component_names(self) -> list[str]:
-        if not self._data:
-            return []
-        return [c.get("name") for c in self._data.components]
+        return list(self._names)
+
+
+# Parsed ASTs keyed by the ast_id returned to the LLM. The model threads the
+# id from parse_code into every analysis tool call, so concurrent analyses
+# never share (or overwrite) each other's AST. Least recently used entries
+# are evicted so a long-running process doesn't keep every AST it parsed.
+AST_STORE_SIZE = 256
+_ast_store: OrderedDict[str, AstContext] = OrderedDict()
+_ast_lock = threading.Lock()
+
+
+def store_ast(ctx: AstContext) -> str:
+    """Register a parsed AST and return its ast_id."""
+    ast_id = uuid4().hex
+    with _ast_lock:
+        _ast_store[ast_id] = ctx
+        if len(_ast_store) > AST_STORE_SIZE:
+            _ast_store.popitem(last=False)
+    return ast_id
+
+
+def get_ast(ast_id: str) -> Optional[AstContext]:
+    """Look up a parsed AST by ast_id (None if unknown or evicted)."""
+    with _ast_lock:
+        ctx = _ast_store.get(ast_id)
+        if ctx is not None:
+            _ast_store.move_to_end(ast_id)
+        return ctx
@@ -0,0 +1,161 @@
+"""
+Persistent parse cache for the React AST parser.
+
+Parse results are stored in SQLite (as JSON) keyed by the SHA-256 of the
+source code and the parser build, so unchanged files skip the Node parser
+entirely on later runs. The hash makes entries self-invalidating: edited
+code or a rebuilt parser simply gets a new key.
+"""
+
+import functools
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from parser_bridge import DEFAULT_PARSER_PATH, ParseResult, parse_react_code
+from utils import dumps_json, loads_json
+
+CACHE_DIR = Path.home() / ".cache" / "react-perf-guardian"
+CACHE_DB = CACHE_DIR / "ast.sqlite"
+
+# In-process LRU in front of SQLite, keyed by (code hash, filename)
+MEMORY_CACHE_SIZE = 256
+
+# Bump when ParseResult or the way it is consumed changes shape
+PARSE_SCHEMA_VERSION = 2
+
+logger = logging.getLogger(__name__)
+
+# One connection shared by every thread (parses run in asyncio.to_thread
+# workers); _db_lock serializes its lazy creation and every use of it
+_conn: Optional[sqlite3.Connection] = None
+_db_lock = threading.Lock()
+_memory_cache: OrderedDict[tuple[str, str], ParseResult] = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Open (once) the cache database, creating the schema if needed. Call with _db_lock held."""
+    global _conn
+    if _conn is None:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # timeout: wait for other processes' write locks instead of failing
+        _conn = sqlite3.connect(CACHE_DB, timeout=5, check_same_thread=False)
+        # WAL lets concurrent CI runs read while another run writes
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS parse_results ("
+            "sha256 TEXT PRIMARY KEY, result TEXT, created_at INT)"
+        )
+        _conn.commit()
+    return _conn
+
+
+@functools.lru_cache(maxsize=None)
+def parser_version() -> str:
+    """Hash of the parser build and PARSE_SCHEMA_VERSION (read once per process)."""
+    h = hashlib.sha256(f"{PARSE_SCHEMA_VERSION}\0".encode())
+    try:
+        h.update(DEFAULT_PARSER_PATH.read_bytes())
+    except OSError:
+        h.update(b"no parser build")
+    return h.hexdigest()
+
+
+def code_hash(code: str) -> str:
+    """
+    Return the cache key for a piece of source code.
+
+    The parser build is part of the key: a parser change (new fields in its
+    output) must not be served stale parses of unchanged files.
+    """
+    h = hashlib.sha256(parser_version().encode())
+    h.update(b"\0")
+    h.update(code.encode())
+    return h.hexdigest()
+
+
+def get_cached_parse(code: str) -> Optional[ParseResult]:
+    """
+    Look up a previous parse of this exact source code.
+
+    Args:
+        code: React/TypeScript source code
+
+    Returns:
+        The cached ParseResult, or None on a miss or unreadable cache
+    """
+    key = code_hash(code)
+    try:
+        with _db_lock:
+            row = _get_connection().execute(
+                "SELECT result FROM parse_results WHERE sha256 = ?", (key,)
+            ).fetchone()
+        return ParseResult.model_validate(loads_json(row[0])) if row else None
+    except Exception as e:
+        logger.warning("⚠️  Parse cache read failed: %s", e)
+        return None
+
+
+def store_parse(code: str, result: ParseResult) -> None:
+    """
+    Store a parse result for this source code.
+
+    Failed parses (timeouts, missing parser build) are not cached so they
+    are retried on the next run.
+
+    Args:
+        code: React/TypeScript source code
+        result: ParseResult returned by parse_react_code
+    """
+    if not result.success:
+        return
+    try:
+        row = (code_hash(code), dumps_json(result.model_dump()), int(time.time()))
+        with _db_lock:
+            conn = _get_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO parse_results (sha256, result, created_at) "
+                "VALUES (?, ?, ?)",
+                row
+            )
+            conn.commit()
+    except Exception as e:
+        logger.warning("⚠️  Parse cache write failed: %s", e)
+
+
+def parse_react_code_cached(code: str, filename: str = "component.tsx") -> ParseResult:
+    """
+    parse_react_code with an in-process LRU and the persistent content-hash
+    cache in front of it.
+
+    Args:
+        code: React/TypeScript source code
+        filename: Virtual filename for the parser
+
+    Returns:
+        ParseResult with component information
+    """
+    key = (code_hash(code), filename)
+    with _memory_lock:
+        cached = _memory_cache.get(key)
+        if cached is not None:
+            _memory_cache.move_to_end(key)
+            return cached
+
+    result = get_cached_parse(code)
+    if result is None:
+        result = parse_react_code(code, filename)
+        store_parse(code, result)
+
+    if result.success:
+        with _memory_lock:
+            _memory_cache[key] = result
+            if len(_memory_cache) > MEMORY_CACHE_SIZE:
+                _memory_cache.popitem(last=False)
+    return result
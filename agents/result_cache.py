@@ -0,0 +1,192 @@
+"""
+Persistent cache of finished analysis reports.
+
+Re-analyzing an unchanged file (CI re-runs, multi-PR scans) would otherwise
+re-run the whole LLM pipeline. The pipeline's report JSON is stored in
+SQLite (and formatted on read, so every output format shares an entry),
+keyed by a hash of everything that shapes it: the code (with indentation
+and trailing whitespace normalized away), filename and memory context.
+Entries expire after RESULT_CACHE_TTL_SECONDS; set PERF_CACHE=off to bypass
+the cache entirely.
+
+Deterministic analysis tools get a second table keyed by TOOL_SCHEMA_VERSION,
+tool name, the content fingerprint of the parsed sources (which covers the
+parser build) and the tool arguments, so a re-analysis (e.g. with a
+different memory context) skips the AST walks too.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from utils import dumps_json, loads_json
+
+CACHE_DIR = Path.home() / ".cache" / "react-perf-guardian"
+CACHE_DB = CACHE_DIR / "results.db"
+
+RESULT_CACHE_TTL_SECONDS = 24 * 3600
+
+# Bump whenever an analysis tool's output changes shape or content, so rows
+# written by older tool logic are never served
+TOOL_SCHEMA_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+# One connection shared by every thread (tools run in asyncio.to_thread
+# workers); _db_lock serializes its lazy creation and every use of it
+_conn: Optional[sqlite3.Connection] = None
+_db_lock = threading.Lock()
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Open (once) the cache database, creating the schema if needed. Call with _db_lock held."""
+    global _conn
+    if _conn is None:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # timeout: wait for other processes' write locks instead of failing
+        _conn = sqlite3.connect(CACHE_DB, timeout=5, check_same_thread=False)
+        # WAL lets concurrent CI runs read while another run writes
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            "key TEXT PRIMARY KEY, result TEXT, created_at REAL)"
+        )
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS tool_results ("
+            "key TEXT PRIMARY KEY, result TEXT, created_at REAL)"
+        )
+        _conn.commit()
+    return _conn
+
+
+def cache_enabled() -> bool:
+    """Return False when PERF_CACHE=off."""
+    return os.getenv("PERF_CACHE", "on").lower() != "off"
+
+
+def normalize_code(code: str) -> str:
+    """
+    Drop per-line indentation and trailing whitespace from code.
+    
+    Re-indented or reformatted-in-place code analyzes the same, and lines
+    keep their numbers, so cached reports still point at the right lines.
+    Comments are deliberately kept: only the parser knows where they are
+    (a "//" in JSX text or a URL is not one), and a wrong guess would hand
+    one file another file's cached report.
+    """
+    return "\n".join(line.strip() for line in code.splitlines())
+
+
+def result_key(code: str, filename: str, memory_context: str = "") -> str:
+    """Return the cache key for one analysis request (whitespace-insensitive in code)."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in (normalize_code(code), filename, memory_context):
+        h.update(part.encode())
+        h.update(b"\0")  # Separator so ("ab", "c") and ("a", "bc") differ
+    return h.hexdigest()
+
+
+def get_cached_result(key: str) -> Optional[str]:
+    """
+    Look up a report that is younger than the TTL.
+
+    Args:
+        key: Key from result_key()
+
+    Returns:
+        The cached report, or None on a miss, expiry or unreadable cache
+    """
+    if not cache_enabled():
+        return None
+    try:
+        with _db_lock:
+            row = _get_connection().execute(
+                "SELECT result FROM reports WHERE key = ? AND created_at > ?",
+                (key, time.time() - RESULT_CACHE_TTL_SECONDS)
+            ).fetchone()
+        return row[0] if row else None
+    except Exception as e:
+        logger.warning("⚠️  Result cache read failed: %s", e)
+        return None
+
+
+def store_result(key: str, result: str) -> None:
+    """
+    Store a finished report.
+
+    Args:
+        key: Key from result_key()
+        result: Report JSON from the analysis pipeline
+    """
+    if not cache_enabled():
+        return
+    try:
+        with _db_lock:
+            conn = _get_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO reports (key, result, created_at) VALUES (?, ?, ?)",
+                (key, result, time.time())
+            )
+            conn.commit()
+    except Exception as e:
+        logger.warning("⚠️  Result cache write failed: %s", e)
+
+
+def tool_result_key(tool_name: str, fingerprint: str, args: dict) -> str:
+    """Return the cache key for one tool call (args canonicalized as sorted JSON)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{TOOL_SCHEMA_VERSION}\0{tool_name}\0{fingerprint}\0".encode())
+    h.update(dumps_json(dict(sorted(args.items()))).encode())
+    return h.hexdigest()
+
+
+def get_cached_tool_result(key: str) -> Optional[dict]:
+    """
+    Look up a tool result that is younger than the TTL.
+
+    Args:
+        key: Key from tool_result_key()
+
+    Returns:
+        The cached tool result, or None on a miss, expiry or unreadable cache
+    """
+    if not cache_enabled():
+        return None
+    try:
+        with _db_lock:
+            row = _get_connection().execute(
+                "SELECT result FROM tool_results WHERE key = ? AND created_at > ?",
+                (key, time.time() - RESULT_CACHE_TTL_SECONDS)
+            ).fetchone()
+        return loads_json(row[0]) if row else None
+    except Exception as e:
+        logger.warning("⚠️  Tool cache read failed: %s", e)
+        return None
+
+
+def store_tool_result(key: str, result: dict) -> None:
+    """
+    Store a tool result.
+
+    Args:
+        key: Key from tool_result_key()
+        result: JSON-serializable tool output
+    """
+    if not cache_enabled():
+        return
+    try:
+        data = dumps_json(result)
+        with _db_lock:
+            conn = _get_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO tool_results (key, result, created_at) VALUES (?, ?, ?)",
+                (key, data, time.time())
+            )
+            conn.commit()
+    except Exception as e:
+        logger.warning("⚠️  Tool cache write failed: %s", e)
@@ -0,0 +1,68 @@
+import re
+from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+
+from utils import intern_label
+
+_FIRST_NUMBER = re.compile(r"\d+")
+
+# Summary status of a report that could not be (fully) parsed
+INVALID_REPORT_STATUS = "Analysis report could not be fully parsed"
+
+
+class Issue(BaseModel):
+    file: Optional[str] = None
+    line: Optional[int] = None
+    component: Optional[str] = None
+    severity: Optional[str] = Field(default=None, description="critical|high|medium|low")
+    confidence: Optional[str] = Field(default=None, description="high|medium|low")
+    title: Optional[str] = None
+    problem: Optional[str] = None
+    suggestion: Optional[str] = None
+    runtime_impact: Optional[str] = None
+    code_before: Optional[str] = None
+    code_after: Optional[str] = None
+    # Short-form fields used by the github output format
+    type: Optional[str] = None
+    description: Optional[str] = None
+
+    @field_validator("severity", "type", "component")
+    @classmethod
+    def _intern(cls, value: Optional[str]) -> Optional[str]:
+        return intern_label(value)
+
+    @field_validator("line", mode="before")
+    @classmethod
+    def _first_line(cls, value):
+        # Models sometimes report a range ("42-45") or "line 42": keep the first line
+        if isinstance(value, str):
+            match = _FIRST_NUMBER.search(value)
+            return int(match.group()) if match else None
+        return value
+
+
+class Summary(BaseModel):
+    total_issues: Optional[int] = None
+    critical_count: Optional[int] = None
+    high_count: Optional[int] = None
+    medium_count: Optional[int] = None
+    low_count: Optional[int] = None
+    files_analyzed: Optional[int] = None
+    components_analyzed: Optional[list[str]] = None
+    overall_health: Optional[str] = Field(default=None, description="good|needs-work|problematic")
+    status: Optional[str] = None
+    # Set on reports rebuilt from tool results when the model gave no answer
+    synthesized: Optional[bool] = None
+
+    @field_validator("components_analyzed", mode="before")
+    @classmethod
+    def _component_names(cls, value):
+        # Fallback reports can carry None for components the parser couldn't name
+        if isinstance(value, list):
+            return [c for c in value if isinstance(c, str)]
+        return value
+
+
+class AnalysisOutput(BaseModel):
+    issues: list[Issue] = Field(default_factory=list)
+    summary: Summary = Field(default_factory=Summary)
@@ -0,0 +1,30 @@
+"""Regression tests for the report cache key (run: python -m unittest)."""
+
+import unittest
+
+from result_cache import normalize_code, result_key
+
+
+class ResultKeyTest(unittest.TestCase):
+    def test_url_in_jsx_text_is_not_a_comment(self):
+        inline = (
+            "function Docs({ go }) {\n"
+            "  return <p>Docs: http://example.com <Child onClick={() => go()} /></p>;\n"
+            "}\n"
+        )
+        stable = (
+            "function Docs({ go }) {\n"
+            "  return <p>Docs: http://example.com <Child onClick={go} /></p>;\n"
+            "}\n"
+        )
+        self.assertIn("onClick={() => go()}", normalize_code(inline))
+        self.assertNotEqual(result_key(inline, "Docs.tsx"), result_key(stable, "Docs.tsx"))
+
+    def test_reindented_code_shares_a_key(self):
+        code = "function A() {\n  return <div />;\n}\n"
+        reindented = "function A() {\n    return <div />;   \n}\n"
+        self.assertEqual(result_key(code, "A.tsx"), result_key(reindented, "A.tsx"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,74 +1,187 @@
+import asyncio
+import functools
+import inspect
+import re
+from collections import Counter, deque
 from typing import Optional
-from parser_bridge import AstContext
+from parser_bridge import get_ast
+from result_cache import tool_result_key, get_cached_tool_result, store_tool_result
+from utils import dumps_json, loads_json
 
-# Get shared context
-ctx = AstContext.get_instance()
 
+# Deterministic false-positive rules, applied before findings reach the LLM.
+# Each rule returns True when the issue should be dropped.
+_INLINE_TYPES = ("inline_function", "inline_object", "inline_array")
+_STABLE_NAME = re.compile(r"^set[A-Z]|Ref$|^dispatch$")
 
-def inspect_component(component_name: str) -> dict:
+FALSE_POSITIVE_RULES = (
+    # Inline values only break memoization when the child is React.memo'd
+    lambda issue: issue.get("type") in _INLINE_TYPES and not issue.get("child_memoized"),
+    # State setters, refs and dispatch are stable and never belong in deps
+    lambda issue: (
+        issue.get("type") == "potentially_missing_dependency"
+        and bool(_STABLE_NAME.search(issue.get("variable", "")))
+    ),
+)
+
+
+def filter_false_positives(issues: list[dict]) -> list[dict]:
+    """Drop issues matched by any FALSE_POSITIVE_RULES entry."""
+    return [i for i in issues if not any(rule(i) for rule in FALSE_POSITIVE_RULES)]
+
+
+def _unknown_ast(ast_id: str) -> dict:
+    return {"error": f"Unknown ast_id '{ast_id}' - call parse_code first"}
+
+
+def _component_not_found(name: str) -> dict:
+    return {"error": f"Component '{name}' not found"}
+
+
+def tool_cache(func):
+    """
+    Cache a deterministic AST tool by (tool name, source fingerprint, args).
+
+    ast_id itself is per-run, so the persistent key uses the content
+    fingerprint of the parsed sources behind it. Results are also memoized
+    in memory on the AstContext under its parse_version, so the LLM asking
+    for the same analysis twice in a run skips the SQLite round trip; the
+    memo holds JSON text, so every hit returns a fresh copy that callers
+    (or ADK) can mutate without corrupting later hits.
+    Error results are never cached; ASTs without a fingerprint are only
+    memoized in memory. Unknown component names are rejected up front,
+    before any cache lookup.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        call_args = dict(bound.arguments)
+        ctx = get_ast(call_args.pop("ast_id"))
+        if ctx is None:
+            return func(*args, **kwargs)
+        name = call_args.get("component_name", call_args.get("start_component"))
+        if name is not None and not ctx.exists(name, call_args.get("file")):
+            return _component_not_found(name)
+
+        memo_key = (func.__name__, ctx.parse_version, *call_args.values())
+        memoized = ctx.tool_memo.get(memo_key)
+        if memoized is not None:
+            return loads_json(memoized)
+
+        fingerprint = ctx.fingerprint
+        key = None
+        if fingerprint is not None:
+            key = tool_result_key(func.__name__, fingerprint, call_args)
+            result = get_cached_tool_result(key)
+        if result is None:
+            result = func(*args, **kwargs)
+            if "error" in result:
+                return result
+            if key is not None:
+                store_tool_result(key, result)
+        ctx.tool_memo[memo_key] = dumps_json(result)
+        return result
+
+    return wrapper
+
+
+@tool_cache
+def inspect_component(ast_id: str, component_name: str, file: Optional[str] = None) -> dict:
     """
     Returns detailed information about a specific React component.
 
     Args:
+        ast_id: Id returned by parse_code / parse_codes
         component_name: Name of the component to inspect (e.g., "UserCard")
+        file: Filename the component lives in (optional, disambiguates batches)
 
     Returns:
         Component details including props, state, hooks, children,
         memoization status, and JSX expressions
     """
-    component = ctx.get_component(component_name)
+    ctx = get_ast(ast_id)
+    if ctx is None:
+        return _unknown_ast(ast_id)
+    component = ctx.get_component(component_name, file)
     if not component:
-        return {"error": f"Component '{component_name}' not found"}
-    return component
+        return _component_not_found(component_name)
+    return component.raw
 
 
-def list_components() -> dict:
+@tool_cache
+def list_components(ast_id: str, file: Optional[str] = None) -> dict:
     """
     Returns a list of all components found in the parsed code.
 
+    Args:
+        ast_id: Id returned by parse_code / parse_codes
+        file: Only list components from this filename (optional). When several
+            files were parsed with parse_codes and no file is given, components
+            from every file are listed.
+
     Returns:
         List of component names with basic metadata
     """
-    data = ctx.get_data()
-    if not data:
-        return {"error": "No code has been parsed yet"}
+    ctx = get_ast(ast_id)
+    if ctx is None:
+        return _unknown_ast(ast_id)
+    files = [file] if file is not None else ctx.get_files()
+    if not files:
+        parsed = ctx.get_components()
+        if parsed is None:
+            return {"error": "No code has been parsed yet"}
+        sources = [(None, parsed)]
+    else:
+        sources = [(f, ctx.get_components(f)) for f in files]
+        if any(parsed is None for _, parsed in sources):
+            return {"error": f"File '{file}' has not been parsed"}
+
+    components = []
+    for filename, parsed in sources:
+        for c in parsed:
+            entry = {
+                "name": c.name,
+                "isMemoized": c.is_memoized,
+                "propsCount": len(c.props),
+                "hooksCount": len(c.hooks),
+                "childrenCount": len(c.children)
+            }
+            if filename is not None:
+                entry["file"] = filename
+            components.append(entry)
 
     return {
-        "components": [
-            {
-                "name": c.get("name"),
-                "isMemoized": c.get("isMemoized"),
-                "propsCount": len(c.get("props", [])),
-                "hooksCount": len(c.get("hooks", [])),
-                "childrenCount": len(c.get("children", []))
-            }
-            for c in data.components
-        ],
-        "total": len(data.components)
+        "components": components,
+        "total": len(components)
     }
 
 
-def trace_prop(prop_name: str, start_component: str) -> dict:
+@tool_cache
+def trace_prop(ast_id: str, prop_name: str, start_component: str) -> dict:
     """
-    Traces how a prop flows through the component tree.
+    Traces how a prop flows through the component tree, following it
+    through every component that passes it on.
 
     Args:
+        ast_id: Id returned by parse_code / parse_codes
         prop_name: The prop to trace (e.g., "onClick", "user")
         start_component: Component where the prop originates
 
     Returns:
         Flow path showing where prop is passed, transformed, and consumed
     """
+    ctx = get_ast(ast_id)
+    if ctx is None:
+        return _unknown_ast(ast_id)
     component = ctx.get_component(start_component)
     if not component:
-        return {"error": f"Component '{start_component}' not found"}
+        return _component_not_found(start_component)
 
     # Find the prop
-    prop = None
-    for p in component.get("props", []):
-        if p.get("name") == prop_name:
-            prop = p
-            break
+    prop = ctx.get_prop(component, prop_name)
 
     if not prop:
         return {"error": f"Prop '{prop_name}' not found in '{start_component}'"}
@@ -82,91 +195,130 @@ def trace_prop(prop_name: str, start_component: str) -> dict:
         "pass_through_components": []
     }
 
-    # Track through children
-    for child_pass in prop.get("passedToChildren", []):
-        child_name = child_pass.get("childComponent")
-        child = ctx.get_component(child_name)
-
-        flow["path"].append({
-            "component": child_name,
-            "received_as": child_pass.get("asPropName"),
-            "transformed": child_pass.get("transformed"),
-            "child_is_memoized": child.get("isMemoized") if child else False
-        })
-
-        # Check if child uses it or just passes through
-        if child:
-            child_prop = None
-            for cp in child.get("props", []):
-                if cp.get("name") == child_pass.get("asPropName"):
-                    child_prop = cp
-                    break
-
-            if child_prop:
-                if child_prop.get("usedInRender"):
-                    flow["terminal_usages"].append({
-                        "component": child_name,
-                        "usage": "render"
-                    })
-                elif child_prop.get("usedInHooks"):
-                    flow["terminal_usages"].append({
-                        "component": child_name,
-                        "usage": "hooks",
-                        "hooks": child_prop.get("usedInHooks")
-                    })
-                else:
-                    flow["pass_through_components"].append(child_name)
+    # Breadth-first over the precomputed prop-flow graph, following the prop
+    # through every hop; visited keeps diamond-shaped or cyclic flows linear
+    start = (start_component, prop_name)
+    queue = deque([(start, 0)])
+    visited = {start}
+    depth = 0
+    while queue:
+        (component_name, name), hop = queue.popleft()
+        for edge in ctx.prop_edges.get((component_name, name), []):
+            depth = max(depth, hop + 1)
+            flow["path"].append({
+                "from": component_name,
+                "component": edge.child,
+                "received_as": edge.as_name,
+                "transformed": edge.transformed,
+                "child_is_memoized": edge.child_memoized
+            })
 
-    flow["depth"] = len(flow["path"])
+            # Each (component, prop) is classified and expanded once
+            nxt = (edge.child, edge.as_name)
+            if nxt in visited:
+                continue
+            visited.add(nxt)
+            queue.append((nxt, hop + 1))
+
+            # Check if child uses it or just passes through
+            child = ctx.get_component(edge.child)
+            if child:
+                child_prop = ctx.get_prop(child, edge.as_name)
+
+                if child_prop:
+                    if child_prop.used_in_render:
+                        flow["terminal_usages"].append({
+                            "component": edge.child,
+                            "usage": "render"
+                        })
+                    elif child_prop.used_in_hooks:
+                        flow["terminal_usages"].append({
+                            "component": edge.child,
+                            "usage": "hooks",
+                            "hooks": list(child_prop.used_in_hooks)
+                        })
+                    else:
+                        flow["pass_through_components"].append(edge.child)
+
+    flow["depth"] = depth
     return flow
 
 
-def analyze_render_triggers(component_name: str) -> dict:
+@tool_cache
+def analyze_render_triggers(
+    ast_id: str,
+    component_name: str,
+    file: Optional[str] = None,
+    summary_only: bool = False
+) -> dict:
     """
     Identifies what causes a component to re-render.
 
     Args:
+        ast_id: Id returned by parse_code / parse_codes
         component_name: Component to analyze
+        file: Filename the component lives in (optional)
+        summary_only: Only report is_memoized and unnecessary_renders_possible
+            (a quick probe when scanning many components)
 
     Returns:
         All possible render triggers with stability assessment
     """
-    component = ctx.get_component(component_name)
+    ctx = get_ast(ast_id)
+    if ctx is None:
+        return _unknown_ast(ast_id)
+    component = ctx.get_component(component_name, file)
     if not component:
-        return {"error": f"Component '{component_name}' not found"}
+        return _component_not_found(component_name)
+
+    if summary_only:
+        # Stops at the first unused prop; no trigger list is built
+        return {
+            "component": component_name,
+            "is_memoized": component.is_memoized,
+            "unnecessary_renders_possible": any(
+                not (prop.used_in_render or prop.used_in_hooks)
+                for prop in component.props
+            )
+        }
 
     triggers = []
+    # Set while building the prop triggers, so no second scan is needed
+    unnecessary = False
 
     # Props as triggers
-    for prop in component.get("props", []):
+    for prop in component.props:
+        actually_used = prop.used_in_render or bool(prop.used_in_hooks)
+        if not actually_used:
+            unnecessary = True
         triggers.append({
             "type": "prop",
-            "name": prop.get("name"),
-            "actually_used": prop.get("usedInRender") or bool(prop.get("usedInHooks")),
+            "name": prop.name,
+            "actually_used": actually_used,
             "stability": "depends_on_parent"
         })
 
     # State as triggers
-    for state in component.get("state", []):
+    for state in component.state:
         triggers.append({
             "type": "state",
-            "name": state.get("name"),
+            "name": state.name,
             "actually_used": True,
             "stability": "changes_on_set"
         })
 
     # Context subscriptions
-    for hook in component.get("hooks", []):
-        if hook.get("type") == "useContext":
+    for hook in component.hooks:
+        if hook.type == "useContext":
             triggers.append({
                 "type": "context",
-                "name": hook.get("returnValue", "unknown"),
+                "name": hook.return_value or "unknown",
                 "actually_used": True,
                 "stability": "depends_on_provider"
             })
 
     # Parent renders (if not memoized)
-    if not component.get("isMemoized"):
+    if not component.is_memoized:
         triggers.append({
             "type": "parent_render",
             "mitigated": False,
@@ -175,52 +327,61 @@ def analyze_render_triggers(component_name: str) -> dict:
 
     return {
         "component": component_name,
-        "is_memoized": component.get("isMemoized"),
+        "is_memoized": component.is_memoized,
         "triggers": triggers,
-        "unnecessary_renders_possible": any(
-            t.get("type") == "prop" and not t.get("actually_used")
-            for t in triggers
-        )
+        "unnecessary_renders_possible": unnecessary
     }
 
 
-def analyze_hook_dependencies(component_name: str, hook_index: Optional[int] = None) -> dict:
+@tool_cache
+def analyze_hook_dependencies(
+    ast_id: str,
+    component_name: str,
+    hook_index: Optional[int] = None,
+    file: Optional[str] = None
+) -> dict:
     """
     Analyzes hook dependency arrays for stability issues.
 
     Args:
+        ast_id: Id returned by parse_code / parse_codes
         component_name: Component containing the hooks
         hook_index: Specific hook index to analyze (optional)
+        file: Filename the component lives in (optional)
 
     Returns:
         Dependency analysis including stability and missing deps
     """
-    component = ctx.get_component(component_name)
+    ctx = get_ast(ast_id)
+    if ctx is None:
+        return _unknown_ast(ast_id)
+    component = ctx.get_component(component_name, file)
     if not component:
-        return {"error": f"Component '{component_name}' not found"}
+        return _component_not_found(component_name)
+
+    # Identifiers React keeps stable across renders (state setters, refs),
+    # gathered once per component; they never belong in a dependency array
+    stable_ids = {s.setter for s in component.state}
+    stable_ids.update(h.return_value for h in component.hooks if h.type == "useRef")
+    stable_ids.discard(None)
 
-    hooks = component.get("hooks", [])
+    # Only hooks with a dependency array, partitioned once per parse
+    dep_hooks = component.dep_hooks
     if hook_index is not None:
-        if hook_index >= len(hooks):
+        if not 0 <= hook_index < len(component.hooks):
             return {"error": f"Hook index {hook_index} out of range"}
-        hooks = [hooks[hook_index]]
-
-    # Filter to hooks with dependency arrays
-    dep_hooks = ["useEffect", "useLayoutEffect", "useMemo", "useCallback"]
+        dep_hooks = [(i, hook) for i, hook in dep_hooks if i == hook_index]
 
     results = []
-    for i, hook in enumerate(hooks):
-        if hook.get("type") not in dep_hooks:
-            continue
-
-        deps = hook.get("dependencies")
-        body_refs = hook.get("bodyReferences", [])
+    for i, hook in dep_hooks:
+        deps = hook.dependencies
+        body_refs = list(hook.body_references)
 
         analysis = {
-            "hook_type": hook.get("type"),
-            "line": hook.get("line"),
+            "hook_type": hook.type,
+            "line": hook.line,
             "index": i,
-            "dependencies": deps,
+            "dependencies": hook.raw.get("dependencies"),
             "body_references": body_refs,
             "issues": []
         }
@@ -232,7 +393,7 @@ def analyze_hook_dependencies(component_name: str, hook_index: Optional[int] = N
                 "severity": "warning",
                 "message": "Hook has no dependency array, will run every render"
             })
-        elif deps == []:
+        elif not deps:
             # Empty array - runs once
             if body_refs:
                 analysis["issues"].append({
@@ -244,27 +405,29 @@ def analyze_hook_dependencies(component_name: str, hook_index: Optional[int] = N
         else:
             # Check stability of each dep
             for dep in deps:
-                if not dep.get("isStable"):
+                if not dep.is_stable:
                     analysis["issues"].append({
                         "type": "unstable_dependency",
                         "severity": "warning",
-                        "dependency": dep.get("name"),
-                        "reason": dep.get("stabilityReason"),
-                        "message": f"'{dep.get('name')}' recreates every render, causing hook to re-run"
+                        "dependency": dep.name,
+                        "reason": dep.stability_reason,
+                        "message": f"'{dep.name}' recreates every render, causing hook to re-run"
                     })
 
-            # Check for missing deps
-            declared_names = {d.get("name") for d in deps}
-            for ref in body_refs:
-                if ref not in declared_names:
-                    # Could be a missing dep (simplified check)
-                    analysis["issues"].append({
-                        "type": "potentially_missing_dependency",
-                        "severity": "info",
-                        "variable": ref,
-                        "message": f"'{ref}' is used but not in dependencies"
-                    })
+            # Check for missing deps: body references minus declared deps
+            # and stable ids, each reported once, in first-reference order
+            excluded = stable_ids.union(d.name for d in deps)
+            missing = [ref for ref in dict.fromkeys(body_refs) if ref not in excluded]
+            for ref in missing:
+                # Could be a missing dep (simplified check)
+                analysis["issues"].append({
+                    "type": "potentially_missing_dependency",
+                    "severity": "info",
+                    "variable": ref,
+                    "message": f"'{ref}' is used but not in dependencies"
+                })
 
+        analysis["issues"] = filter_false_positives(analysis["issues"])
         analysis["has_issues"] = len(analysis["issues"]) > 0
         results.append(analysis)
 
@@ -276,21 +439,27 @@ def analyze_hook_dependencies(component_name: str, hook_index: Optional[int] = N
     }
 
 
-def analyze_state_relationships(component_name: str) -> dict:
+@tool_cache
+def analyze_state_relationships(ast_id: str, component_name: str, file: Optional[str] = None) -> dict:
     """
     Identifies relationships between state variables.
 
     Args:
+        ast_id: Id returned by parse_code / parse_codes
         component_name: Component to analyze
+        file: Filename the component lives in (optional)
 
     Returns:
         State relationships and consolidation opportunities
     """
-    component = ctx.get_component(component_name)
+    ctx = get_ast(ast_id)
+    if ctx is None:
+        return _unknown_ast(ast_id)
+    component = ctx.get_component(component_name, file)
     if not component:
-        return {"error": f"Component '{component_name}' not found"}
+        return _component_not_found(component_name)
 
-    state_vars = component.get("state", [])
+    state_vars = component.state
     relationships = []
 
     # This would need more sophisticated analysis in the parser
@@ -301,10 +470,10 @@ def analyze_state_relationships(component_name: str) -> dict:
         "state_count": len(state_vars),
         "state_variables": [
             {
-                "name": s.get("name"),
-                "setter": s.get("setter"),
-                "type": s.get("type"),
-                "usage_count": len(s.get("usageLocations", []))
+                "name": s.name,
+                "setter": s.setter,
+                "type": s.type,
+                "usage_count": s.usage_count
             }
             for s in state_vars
         ],
@@ -313,48 +482,159 @@ def analyze_state_relationships(component_name: str) -> dict:
     }
 
 
-def analyze_jsx_expressions(component_name: str) -> dict:
+@tool_cache
+def analyze_jsx_expressions(ast_id: str, component_name: str, file: Optional[str] = None) -> dict:
     """
     Analyzes inline expressions in JSX for render performance issues.
 
     Args:
+        ast_id: Id returned by parse_code / parse_codes
         component_name: Component to analyze
+        file: Filename the component lives in (optional)
 
     Returns:
         JSX expressions that may cause unnecessary re-renders
     """
-    component = ctx.get_component(component_name)
+    ctx = get_ast(ast_id)
+    if ctx is None:
+        return _unknown_ast(ast_id)
+    component = ctx.get_component(component_name, file)
     if not component:
-        return {"error": f"Component '{component_name}' not found"}
+        return _component_not_found(component_name)
 
-    expressions = component.get("jsxExpressions", [])
+    expressions = component.jsx_expressions
 
     issues = []
     for expr in expressions:
         severity = "low"
 
         # High severity if passed to memoized component
-        if expr.get("isComponentMemoized"):
+        if expr.is_component_memoized:
             severity = "high"
         # Medium if it's a function (could affect child hooks)
-        elif expr.get("type") == "inline_function":
+        elif expr.type == "inline_function":
             severity = "medium"
 
         issues.append({
-            "type": expr.get("type"),
-            "line": expr.get("line"),
-            "prop_name": expr.get("propName"),
-            "passed_to": expr.get("passedToComponent"),
-            "child_memoized": expr.get("isComponentMemoized"),
+            "type": expr.type,
+            "line": expr.line,
+            "prop_name": expr.prop_name,
+            "passed_to": expr.passed_to_component,
+            "child_memoized": expr.is_component_memoized,
             "severity": severity,
-            "captured_variables": expr.get("capturedVariables", []),
-            "source_preview": expr.get("sourceText", "")[:80]
+            "captured_variables": list(expr.captured_variables),
+            "source_preview": expr.source_text[:80]
         })
 
+    kept = filter_false_positives(issues)
+    filtered = len(issues) - len(kept)
+    issues = kept
+    # Both counts from one pass over the kept issues
+    severities = Counter(i["severity"] for i in issues)
+
     return {
         "component": component_name,
         "issues": issues,
         "total_issues": len(issues),
-        "high_severity_count": len([i for i in issues if i["severity"] == "high"]),
-        "medium_severity_count": len([i for i in issues if i["severity"] == "medium"])
+        "high_severity_count": severities["high"],
+        "medium_severity_count": severities["medium"],
+        "filtered_false_positives": filtered
+    }
+
+
+async def analyze_component_all(ast_id: str, component_name: str, file: Optional[str] = None) -> dict:
+    """
+    Runs every per-component analysis in one call.
+
+    The analyses are independent AST walks, so they run concurrently on the
+    thread pool and come back as one merged result.
+
+    Args:
+        ast_id: Id returned by parse_code / parse_codes
+        component_name: Component to analyze
+        file: Filename the component lives in (optional, disambiguates batches)
+
+    Returns:
+        Component details plus render trigger, hook dependency,
+        state relationship and JSX expression analyses
+    """
+    ctx = get_ast(ast_id)
+    if ctx is None:
+        return _unknown_ast(ast_id)
+    if not ctx.exists(component_name, file):
+        return _component_not_found(component_name)
+
+    details, render_triggers, hook_dependencies, state_relationships, jsx_expressions = (
+        await asyncio.gather(
+            asyncio.to_thread(inspect_component, ast_id, component_name, file),
+            asyncio.to_thread(analyze_render_triggers, ast_id, component_name, file),
+            asyncio.to_thread(analyze_hook_dependencies, ast_id, component_name, None, file),
+            asyncio.to_thread(analyze_state_relationships, ast_id, component_name, file),
+            asyncio.to_thread(analyze_jsx_expressions, ast_id, component_name, file),
+        )
+    )
+
+    return {
+        "component": component_name,
+        "details": details,
+        "render_triggers": render_triggers,
+        "hook_dependencies": hook_dependencies,
+        "state_relationships": state_relationships,
+        "jsx_expressions": jsx_expressions
+    }
+
+
+# analyze_all kinds -> per-component analyzer
+_ANALYZERS = {
+    "render_triggers": analyze_render_triggers,
+    "hook_dependencies": analyze_hook_dependencies,
+    "state_relationships": analyze_state_relationships,
+    "jsx_expressions": analyze_jsx_expressions,
+}
+
+
+async def analyze_all(ast_id: str, kind: str, file: Optional[str] = None) -> dict:
+    """
+    Runs one analysis over every parsed component in one call.
+
+    The parsed AST is read-only, so the per-component analyses run
+    concurrently on the thread pool.
+
+    Args:
+        ast_id: Id returned by parse_code / parse_codes
+        kind: One of "render_triggers", "hook_dependencies",
+            "state_relationships", "jsx_expressions"
+        file: Only analyze components from this filename (optional)
+
+    Returns:
+        One analysis result per component, in parse order
+    """
+    analyzer = _ANALYZERS.get(kind)
+    if analyzer is None:
+        return {"error": f"Unknown kind '{kind}', expected one of {sorted(_ANALYZERS)}"}
+    ctx = get_ast(ast_id)
+    if ctx is None:
+        return _unknown_ast(ast_id)
+
+    files = [file] if file is not None else ctx.get_files()
+    if not files:
+        targets = [(c.name, None) for c in ctx.get_components() or ()]
+    else:
+        targets = []
+        for f in files:
+            parsed = ctx.get_components(f)
+            if parsed is None:
+                return {"error": f"File '{f}' has not been parsed"}
+            targets.extend((c.name, f) for c in parsed)
+
+    results = await asyncio.gather(*(
+        asyncio.to_thread(analyzer, ast_id, name, file=f) for name, f in targets
+    ))
+    return {
+        "kind": kind,
+        "components_analyzed": len(results),
+        "results": [
+            {**result, "file": f} if f is not None else result
+            for (_, f), result in zip(targets, results)
+        ]
     }
@@ -1,8 +1,109 @@
-from google.genai import types
-
-retry_config=types.HttpRetryOptions(
-    attempts=5,  # Maximum retry attempts
-    exp_base=7,  # Delay multiplier
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],
-)
\ No newline at end of file
+import asyncio
+import json
+import sys
+import time
+
+# orjson is an optional speedup (Rust, 3-10x faster than stdlib json);
+# fall back to stdlib json when it isn't installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# uvloop is an optional, drop-in faster event loop (libuv, not on Windows)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Interned severity labels: issue dicts repeat these strings hundreds of times
+SEVERITY_LABELS = {
+    s: sys.intern(s)
+    for s in ("critical", "high", "medium", "low", "warning", "suggestion", "info")
+}
+
+
+def __getattr__(name):
+    # retry_config needs google.genai (about a second to import); build it on
+    # first access so importing utils for the JSON helpers stays cheap
+    if name == "retry_config":
+        from google.genai import types
+        global retry_config
+        retry_config = types.HttpRetryOptions(
+            attempts=5,  # Maximum retry attempts
+            exp_base=7,  # Delay multiplier
+            initial_delay=1,
+            http_status_codes=[429, 500, 503, 504],
+        )
+        return retry_config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def dumps_json(obj, indent: bool = False, default=None) -> str:
+    """
+    Serialize obj to a JSON string, pretty-printed with 2 spaces if indent.
+
+    default is called for objects JSON can't represent, as in json.dumps.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, default=default, option=option).decode()
+    return json.dumps(obj, indent=2 if indent else None, default=default)
+
+
+def loads_json(data):
+    """Parse a JSON str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def intern_label(value):
+    """Return the shared copy of a repeated label (severity, issue type, component name)."""
+    if not isinstance(value, str):
+        return value
+    return SEVERITY_LABELS.get(value) or sys.intern(value)
+
+
+def install_fast_event_loop() -> bool:
+    """Use uvloop for the next asyncio.run() when available; return True if installed."""
+    if uvloop is None or sys.platform == "win32":
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket allowing max_rate acquisitions per time_period seconds.
+
+    Use as `async with limiter:`; entering waits until a token is free.
+    Bursts up to max_rate are allowed, then calls are spread evenly.
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 60):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._last = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        rate = self.max_rate / self.time_period
+        self._tokens = min(self.max_rate, self._tokens + (now - self._last) * rate)
+        self._last = now
+
+    async def acquire(self) -> None:
+        """Wait for a token and consume it."""
+        self._refill()
+        while self._tokens < 1:
+            await asyncio.sleep((1 - self._tokens) * self.time_period / self.max_rate)
+            self._refill()
+        self._tokens -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
@@ -3,18 +3,67 @@
 Verify Python setup for React Performance Agent
 """
 
+import importlib
+import importlib.util
 import sys
 import os
 
-def check_import(module_name, import_statement):
-    """Check if a module can be imported"""
+def check_import(module_name, module_path):
+    """Check if a module is installed, without running its top-level code"""
     try:
-        exec(import_statement)
+        found = importlib.util.find_spec(module_path) is not None
+    except ImportError as e:  # A parent package is missing
+        print(f"❌ {module_name}: {e}")
+        return False
+    if found:
         print(f"✅ {module_name}")
-        return True
+    else:
+        print(f"❌ {module_name}: No module named '{module_path}'")
+    return found
+
+def check_local_module(module_name, attributes):
+    """Import one of our own modules and check it exposes the given names"""
+    try:
+        module = importlib.import_module(module_name)
     except ImportError as e:
         print(f"❌ {module_name}: {e}")
         return False
+    missing = [attr for attr in attributes if not hasattr(module, attr)]
+    if missing:
+        print(f"❌ {module_name}: cannot import {', '.join(missing)}")
+        return False
+    print(f"✅ {module_name}")
+    return True
+
+def check_tool_declarations():
+    """Check agents' cached tool declarations match what this ADK version builds"""
+    try:
+        from google.adk.tools import FunctionTool
+        import agents
+    except ImportError as e:
+        print(f"❌ Tool declarations: {e}")
+        return False
+    # _CachedFunctionTool overrides a private ADK method; a renamed or
+    # re-signatured hook would silently bypass or break it
+    if not callable(getattr(FunctionTool, "_get_declaration", None)):
+        print("❌ Tool declarations: FunctionTool._get_declaration is gone; "
+              "install the google-adk version from requirements.txt")
+        return False
+    for tool in (agents._tool(agents.parse_code), agents._tool(agents.list_components)):
+        cached = tool._get_declaration()
+        if cached is not tool._get_declaration() or cached != FunctionTool(tool.func)._get_declaration():
+            print(f"❌ Tool declarations: cached declaration of {tool.name} is stale")
+            return False
+    print("✅ Tool declarations")
+    return True
+
+def list_dir(path):
+    """Names of the files in a directory (empty if it doesn't exist)"""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+    except OSError:
+        return set()
 
 def main():
     print("🔍 Verifying Python Setup for React Performance Agent")
@@ -27,8 +76,9 @@ def main():
     print("📋 Python Version:")
     version = sys.version_info
     print(f"   Python {version.major}.{version.minor}.{version.micro}")
-    if version.major < 3 or (version.major == 3 and version.minor < 9):
-        print("   ⚠️  Warning: Python 3.9+ recommended")
+    # parser_bridge uses dataclass(slots=True), new in 3.10
+    if version.major < 3 or (version.major == 3 and version.minor < 10):
+        print("   ⚠️  Warning: Python 3.10+ required")
         all_ok = False
     else:
         print("   ✅ Version OK")
@@ -37,37 +87,39 @@ def main():
     # Check imports
     print("📦 Checking Required Packages:")
     imports = [
-        ("Google ADK - Agent", "from google.adk.agents import Agent, SequentialAgent"),
-        ("Google ADK - Tools", "from google.adk.tools import FunctionTool"),
-        ("Google ADK - Sessions", "from google.adk.sessions import InMemorySessionService"),
-        ("Google ADK - Runner", "from google.adk.runners import Runner"),
-        ("Google GenAI", "from google.genai import types"),
-        ("Pydantic", "import pydantic"),
-        ("Python Dotenv", "from dotenv import load_dotenv"),
+        ("Google ADK - Agent", "google.adk.agents"),
+        ("Google ADK - Tools", "google.adk.tools"),
+        ("Google ADK - Sessions", "google.adk.sessions"),
+        ("Google ADK - Runner", "google.adk.runners"),
+        ("Google GenAI", "google.genai"),
+        ("Pydantic", "pydantic"),
+        ("Python Dotenv", "dotenv"),
     ]
 
-    for name, statement in imports:
-        if not check_import(name, statement):
+    for name, module_path in imports:
+        if not check_import(name, module_path):
             all_ok = False
     print()
 
     # Check local modules
     print("📁 Checking Local Modules:")
     local_modules = [
-        ("parser_bridge", "from parser_bridge import parse_react_code, AstContext"),
-        ("tools", "from tools import list_components, inspect_component"),
-        ("agents", "from agents import performance_analyzer"),
-        ("memory", "from memory import ProjectMemory"),
+        ("parser_bridge", ("parse_react_code", "AstContext")),
+        ("tools", ("list_components", "inspect_component")),
+        ("agents", ("performance_analyzer",)),
+        ("memory", ("ProjectMemory",)),
     ]
 
-    for name, statement in local_modules:
-        if not check_import(name, statement):
+    for name, attributes in local_modules:
+        if not check_local_module(name, attributes):
             all_ok = False
+    if not check_tool_declarations():
+        all_ok = False
     print()
 
     # Check .env file
     print("🔑 Checking .env File and API Key:")
-    if os.path.exists('.env'):
+    if os.path.isfile('.env'):
         print("   ✅ .env file found")
         # Load .env
         try:
@@ -95,7 +147,7 @@ def main():
     # Check parser
     print("🏗️  Checking Parser:")
     parser_path = "../parser/dist/cli.js"
-    if os.path.exists(parser_path):
+    if os.path.isfile(parser_path):
         print(f"   ✅ Parser found at {parser_path}")
     else:
         print(f"   ❌ Parser not found at {parser_path}")
@@ -105,15 +157,16 @@ def main():
 
     # Check example files
     print("📄 Checking Example Files:")
-    example_files = [
-        "../examples/UserList.tsx",
-        "../examples/UserCard.tsx"
-    ]
+    examples_dir = "../examples"
+    example_files = ["UserList.tsx", "UserCard.tsx"]
+    # One directory scan instead of a stat per example
+    examples_present = list_dir(examples_dir)
     for example_file in example_files:
-        if os.path.exists(example_file):
-            print(f"   ✅ {example_file}")
+        example_path = f"{examples_dir}/{example_file}"
+        if example_file in examples_present:
+            print(f"   ✅ {example_path}")
         else:
-            print(f"   ❌ {example_file} not found")
+            print(f"   ❌ {example_path} not found")
     print()
 
     # Final verdict
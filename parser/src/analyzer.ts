@@ -483,12 +483,18 @@ export class ReactAstAnalyzer {
       bodyReferences = this.extractBodyReferences(args[0]);
     }
 
+    // Name the hook result is bound to (const ref = useRef(...))
+    const parent = path.parentPath;
+    const returnValue = parent?.isVariableDeclarator() && t.isIdentifier(parent.node.id)
+      ? parent.node.id.name
+      : undefined;
+
     return {
       type: hookName,
       line: path.node.loc?.start.line || 1,
       dependencies,
       bodyReferences,
-      returnValue: undefined,
+      returnValue,
       isCustomHook: hookName.startsWith('use') && 
         !['useState', 'useEffect', 'useLayoutEffect', 'useContext', 'useReducer', 
           'useCallback', 'useMemo', 'useRef', 'useImperativeHandle'].includes(hookName)
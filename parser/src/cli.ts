@@ -4,10 +4,41 @@ import * as readline from "readline";
 
 const analyzer = new ReactAstAnalyzer();
 
+// Long-lived mode for the Python bridge: one JSON request per stdin line
+// ({"code": "..."}), one compact JSON result per stdout line. Saves a Node
+// start-up per parsed file.
+async function serve() {
+  const rl = readline.createInterface({
+    input: process.stdin,
+    terminal: false
+  });
+
+  for await (const line of rl) {
+    if (!line.trim()) continue;
+    let result: unknown;
+    try {
+      const request = JSON.parse(line);
+      result = analyzer.parse(request.code);
+    } catch (error) {
+      result = {
+        success: false,
+        components: [],
+        imports: [],
+        exports: [],
+        errors: [{ message: `Invalid request: ${error}` }],
+        metadata: {}
+      };
+    }
+    process.stdout.write(JSON.stringify(result) + "\n");
+  }
+}
+
 async function main() {
   const args = process.argv.slice(2);
 
-  if (args.length > 0 && args[0] !== "-") {
+  if (args[0] === "--serve") {
+    await serve();
+  } else if (args.length > 0 && args[0] !== "-") {
     // File path provided
     const code = fs.readFileSync(args[0], "utf-8");
     const result = analyzer.parse(code, args[0]);